@@ -8,8 +8,8 @@ from flask_login import LoginManager, current_user
 from flask_wtf.csrf import CSRFProtect, generate_csrf
 from flask_babel import Babel, gettext
 from flask_limiter.errors import RateLimitExceeded
-from models.database import db, User
-from models import db_utils
+from models.database import db
+from models import db_utils, db_tuning, replicas, cache, response_cache, assets, instrumentation, metrics, hashing, sessions, i18n
 from models.limiter import limiter, rate_limit_handler
 
 import blueprints
@@ -29,6 +29,65 @@ def create_app(config=None):
     # Database configuration
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///notes.db')  # Load from .env, fallback to SQLite
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable track modifications
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 10))  # Persistent connections per worker (server databases)
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 20))  # Extra connections allowed under load
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))  # Seconds before a connection is replaced
+    app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+    app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'  # Test connections before use
+    app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')  # WAL lets readers and a writer work concurrently
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # NORMAL is safe with WAL and avoids an fsync per commit
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))  # Milliseconds to wait for a lock instead of "database is locked"
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))  # Bytes of the database file to memory-map (0 = off)
+    app.config['SQLALCHEMY_REPLICA_URIS'] = [uri.strip() for uri in os.getenv('REPLICA_DATABASE_URLS', '').split(',') if uri.strip()]  # Read replicas (comma-separated)
+    app.config['REPLICA_PIN_SECONDS'] = int(os.getenv('REPLICA_PIN_SECONDS', 10))  # Read from the primary this long after a write request
+
+    # Session configuration
+    app.config['SESSION_BACKEND'] = os.getenv('SESSION_BACKEND', 'cookie')  # 'cookie' (signed cookie) or 'sqlite' (server-side, shared across workers)
+    if os.getenv('SESSION_PATH'):
+        app.config['SESSION_PATH'] = os.getenv('SESSION_PATH')  # SQLite file, defaults to instance/sessions.db
+    app.config['SESSION_PURGE_INTERVAL'] = int(os.getenv('SESSION_PURGE_INTERVAL', 300))  # Seconds between deletions of expired sessions
+
+    # Pagination configuration
+    app.config['PAGINATION_MODE'] = os.getenv('PAGINATION_MODE', 'offset')  # 'offset' (page numbers) or 'keyset' (cursors)
+    app.config['PAGINATION_COUNT'] = os.getenv('PAGINATION_COUNT', 'True').lower() == 'true'  # Count total rows in keyset mode
+
+    # Cache configuration
+    app.config['CATEGORY_CACHE_TTL'] = int(os.getenv('CATEGORY_CACHE_TTL', 0))  # Seconds to share category lists across requests (0 = per request only)
+    app.config['CATEGORY_CACHE_SIZE'] = int(os.getenv('CATEGORY_CACHE_SIZE', 1024))  # Max users kept in the category cache
+    app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 0))  # Seconds to reuse the logged-in user's identity without a query (0 = load User per request)
+    app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', 10000))  # Max users kept in the user cache
+    app.config['RESPONSE_CACHE_BACKEND'] = os.getenv('RESPONSE_CACHE_BACKEND', 'none')  # 'none', 'memory' (pages per worker) or 'sqlite' (pages shared)
+    app.config['RESPONSE_CACHE_TTL'] = int(os.getenv('RESPONSE_CACHE_TTL', 300))  # Seconds a rendered page may be reused
+    app.config['RESPONSE_CACHE_SIZE'] = int(os.getenv('RESPONSE_CACHE_SIZE', 512))  # Max pages in the memory backend
+    if os.getenv('RESPONSE_CACHE_PATH'):
+        app.config['RESPONSE_CACHE_PATH'] = os.getenv('RESPONSE_CACHE_PATH')  # SQLite file for versions (and sqlite pages), defaults to instance/response_cache.db
+
+    # Static assets and compression configuration
+    app.config['ASSET_FINGERPRINTING'] = os.getenv('ASSET_FINGERPRINTING', 'True').lower() == 'true'  # Add ?v=<content hash> to static URLs
+    app.config['COMPRESS_RESPONSES'] = os.getenv('COMPRESS_RESPONSES', 'True').lower() == 'true'  # Gzip dynamic HTML/JSON responses
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # Minimum body size in bytes to compress
+    app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))  # Gzip compression level (1-9)
+    app.config['FRONTEND_ASSETS'] = os.getenv('FRONTEND_ASSETS', 'cdn')  # 'cdn' or 'local' (bundle built by "flask build-assets")
+
+    # Instrumentation configuration
+    app.config['INSTRUMENTATION_ENABLED'] = os.getenv('INSTRUMENTATION_ENABLED', 'False').lower() == 'true'  # Server-Timing headers and per-request log lines
+    app.config['INSTRUMENTATION_SLOW_QUERIES'] = int(os.getenv('INSTRUMENTATION_SLOW_QUERIES', 3))  # Number of slowest statements to log per request
+    app.config['INSTRUMENTATION_PROFILE_DIR'] = os.getenv('INSTRUMENTATION_PROFILE_DIR')  # Directory for profiles of slow requests (unset = no profiling)
+    app.config['INSTRUMENTATION_PROFILE_THRESHOLD_MS'] = float(os.getenv('INSTRUMENTATION_PROFILE_THRESHOLD_MS', 500))  # Requests slower than this are dumped
+    app.config['INSTRUMENTATION_PROFILER'] = os.getenv('INSTRUMENTATION_PROFILER', 'cprofile')  # 'cprofile' or 'pyinstrument' (if installed)
+
+    # Metrics configuration
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'False').lower() == 'true'  # Expose Prometheus metrics at /metrics
+    app.config['METRICS_DIR'] = os.getenv('METRICS_DIR')  # Shared directory to aggregate metrics of all worker processes (unset = this process only)
+    app.config['METRICS_FLUSH_INTERVAL'] = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))  # Seconds between writes of a worker's metrics file
+
+    # Password hashing configuration
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')  # Werkzeug method, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:1000000'
+    app.config['PASSWORD_HASH_SALT_LENGTH'] = int(os.getenv('PASSWORD_HASH_SALT_LENGTH', 16))  # Salt characters per hash
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 0))  # Hashing processes per worker (0 = hash on the request thread)
+    app.config['PASSWORD_HASH_QUEUE_SIZE'] = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', 16))  # Jobs allowed to wait for a process before returning 503
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))  # Seconds to wait for a hashing job before returning 503
+    app.config['PASSWORD_HASH_RETRY_AFTER'] = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', 5))  # Retry-After seconds of the 503 response
 
     # ReCaptcha configuration
     app.config['RECAPTCHA_PUBLIC_KEY'] = os.getenv('RECAPTCHA_PUBLIC_KEY')
@@ -38,21 +97,38 @@ def create_app(config=None):
     app.config['LANGUAGES'] = ['en', 'de']
     app.config['BABEL_DEFAULT_LOCALE'] = 'en'
     app.config['BABEL_DEFAULT_TIMEZONE'] = 'UTC'
+    app.config['LOCALE_CACHE_SIZE'] = int(os.getenv('LOCALE_CACHE_SIZE', 256))  # Distinct Accept-Language headers remembered per worker
 
     # Override with provided config (for testing)
     if config:
         app.config.update(config)
 
+    # Engine options derived from the database configuration (unless given explicitly)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', db_tuning.engine_options(app.config))
+
     # Initialize extensions
+    assets.init_app(app)  # Initialize asset pipeline first, so compression runs after all other after_request hooks
+    instrumentation.init_app(app)  # Initialize request timing before other hooks, so it measures them
     db.init_app(app)
+    replicas.init_app(app)  # Route reads of GET requests to read replicas
+    db_tuning.init_app(app)  # Apply SQLite PRAGMAs on connect (primary and replicas)
     Migrate(app, db)  # Initialize Flask-Migrate
     db_utils.init_app(app)  # Initialize database utilities
+    hashing.init_app(app)  # Initialize password hashing service
+    metrics.init_app(app)  # Initialize metrics before the rate limiter, so rejected requests are timed too
     limiter.init_app(app)  # Initialize rate limiter
+    cache.init_app(app)  # Initialize category cache
+    response_cache.init_app(app)  # Initialize rendered page cache
+    sessions.init_app(app)  # Initialize server-side sessions (if enabled)
 
     # Register rate limit error handler
     app.register_error_handler(RateLimitExceeded, rate_limit_handler)
 
     # User language preference
+    resolve_accept_language = i18n.accept_language_resolver(app.config['LANGUAGES'], app.config['BABEL_DEFAULT_LOCALE'], app.config['LOCALE_CACHE_SIZE'])
+
+    @instrumentation.timed_locale
+    @i18n.memoized_per_request
     def get_locale():
         """Select the best match for supported languages."""
         # Check if language is set in session (primary source)
@@ -60,11 +136,12 @@ def create_app(config=None):
             return session['language']
 
         # Use browser's preferred language as fallback
-        return request.accept_languages.best_match(app.config['LANGUAGES']) or app.config['BABEL_DEFAULT_LOCALE']
+        return resolve_accept_language(request.headers.get('Accept-Language', ''))
 
     # Initialize Babel with locale_selector
     babel = Babel()
     babel.init_app(app, locale_selector=get_locale)
+    i18n.init_app(app)  # Load translation catalogs at startup
 
     # Register translation function for templates
     app.jinja_env.globals['translate'] = gettext
@@ -88,9 +165,6 @@ def create_app(config=None):
             get_locale=get_locale
         )
 
-    # Make gettext available in templates
-    app.jinja_env.globals.update(_=gettext, translate=gettext)
-
     # Initialize Flask-Login
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -98,7 +172,7 @@ def create_app(config=None):
 
     @login_manager.user_loader
     def load_user(user_id):
-        return db.session.get(User, int(user_id))
+        return cache.load_user(int(user_id))
 
     # Register blueprints
     for module in blueprints.submodules:
@@ -0,0 +1,131 @@
+"""
+Internationalization overhead benchmark for Flask Notes app.
+Requests the notes list (notes.index) with different languages and reports the time spent
+per request selecting the locale and translating strings.
+
+    python -m benchmarks.i18n --iterations 200
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from array import array
+
+from flask_babel import Domain
+
+from benchmarks.workload import Workload, create_benchmark_app, populate, percentile
+from models import i18n, instrumentation
+
+# Accept-Language per variant; 'unique' sends a new header every request, so the header cache never hits
+VARIANTS = {
+    'en': 'en-US,en;q=0.9',
+    'de': 'de-DE,de;q=0.9,en;q=0.8',
+    'unique': None,
+    'session': None,
+}
+
+class GettextTimer:
+    """Time every gettext call made while installed.
+
+    Covers flask_babel's Domain.gettext (views, forms, lazy strings) and the catalog-bound
+    functions that models.i18n injects into templates as translate/_.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self._original = Domain.gettext
+        self._original_bound = i18n.bound_gettext
+
+    def _timed(self, function):
+        def timed(*args, **variables):
+            start = time.perf_counter()
+            try:
+                return function(*args, **variables)
+            finally:
+                self.seconds += time.perf_counter() - start
+                self.calls += 1
+        return timed
+
+    def __enter__(self):
+        original_bound = self._original_bound
+        Domain.gettext = self._timed(self._original)
+        i18n.bound_gettext = lambda translations: self._timed(original_bound(translations))
+        return self
+
+    def __exit__(self, *exc):
+        Domain.gettext = self._original
+        i18n.bound_gettext = self._original_bound
+
+def record_locale_time(app):
+    """Collect the locale selection time of every request (register before the first request)."""
+    locale_seconds = []
+
+    @app.after_request
+    def record(response):
+        timing = instrumentation.current_timing()
+        if timing is not None:
+            locale_seconds.append(timing.locale_time)
+        return response
+    return locale_seconds
+
+def run_variant(workload, locale_seconds, variant, iterations, warmup=3):
+    """Return request latency (ms) and locale/gettext time per request (µs) for one language variant."""
+    client = workload.client
+    with client.session_transaction() as sess:
+        if variant == 'session':
+            sess['language'] = 'de'
+        else:
+            sess.pop('language', None)
+
+    def request(n):
+        header = VARIANTS[variant] or f'de-DE,de;q=0.9,x-bench-{n};q=0.1'
+        return client.get('/notes/', headers={'Accept-Language': header})
+
+    for n in range(warmup):
+        request(-n - 1)
+    locale_seconds.clear()
+
+    latencies = array('d')
+    with GettextTimer() as gettext:
+        for n in range(iterations):
+            start = time.perf_counter()
+            response = request(n)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f'{variant} failed with status {response.status_code}')
+
+    return {
+        'p50_ms': percentile(latencies, 50),
+        'locale_us': sum(locale_seconds) / iterations * 1e6,
+        'gettext_calls': gettext.calls / iterations,
+        'gettext_us': gettext.seconds / iterations * 1e6,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark locale selection and translation overhead of the notes list.')
+    parser.add_argument('--notes-per-user', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=200, help='Measured requests per variant')
+    parser.add_argument('--variant', action='append', choices=VARIANTS, help='Run only these variants (repeatable)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_benchmark_app(f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}", INSTRUMENTATION_ENABLED=True)
+        # Request timing supplies the locale selection time; its log lines are not needed here
+        logging.getLogger('flask_notes.instrumentation').setLevel(logging.WARNING)
+        locale_seconds = record_locale_time(app)
+        usernames = populate(app, 1, args.notes_per_user, 5)
+        workload = Workload(app, usernames[0])
+
+        print(f"{'variant':<10}{'p50 ms':>9}{'locale µs':>11}{'gettext calls':>15}{'gettext µs':>12}{'i18n %':>8}")
+        for variant in args.variant or VARIANTS:
+            result = run_variant(workload, locale_seconds, variant, args.iterations)
+            share = (result['locale_us'] + result['gettext_us']) / 1000 / result['p50_ms'] * 100
+            print(f"{variant:<10}{result['p50_ms']:>9.2f}{result['locale_us']:>11.1f}{result['gettext_calls']:>15.1f}"
+                  f"{result['gettext_us']:>12.1f}{share:>8.1f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
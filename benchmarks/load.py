@@ -0,0 +1,80 @@
+"""
+Standalone load driver for Flask Notes app.
+Seeds a synthetic dataset, runs every scenario through the Flask test client and
+reports p50/p95/p99 latency, queries per request and peak memory. Results can be
+saved as a baseline and compared against it to detect regressions.
+
+    python -m benchmarks.load --users 10 --notes-per-user 1000 --categories 10
+    python -m benchmarks.load --save-baseline
+    python -m benchmarks.load --compare
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.workload import SCENARIOS, Workload, create_benchmark_app, populate, run_scenario
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+def compare(results, baseline, tolerance):
+    """Return regression messages: p95 latency above the tolerance or more queries than the baseline."""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get('results', {}).get(name)
+        if expected is None:
+            continue
+        if result['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.1f} ms > baseline {expected['p95_ms']:.1f} ms (+{tolerance:.0%})")
+        if result['queries'] > expected['queries']:
+            regressions.append(f"{name}: {result['queries']} queries per request > baseline {expected['queries']}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the core Flask Notes endpoints.')
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--notes-per-user', type=int, default=2000)
+    parser.add_argument('--categories', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=50, help='Measured requests per scenario')
+    parser.add_argument('--database', help='Database URI (default: a temporary SQLite file). Existing synthetic data is reused.')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Run only these scenarios (repeatable)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results to the baseline file')
+    parser.add_argument('--compare', action='store_true', help='Exit with status 1 if results regress against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 latency increase over the baseline (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = args.database or f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        app = create_benchmark_app(database)
+        print(f'Seeding {args.users} users x {args.notes_per_user} notes x {args.categories} categories...', file=sys.stderr)
+        usernames = populate(app, args.users, args.notes_per_user, args.categories, seed=args.seed)
+        workload = Workload(app, usernames[0])
+
+        results = {}
+        print(f"{'scenario':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}{'peak KiB':>11}")
+        for name in args.scenario or SCENARIOS:
+            result = results[name] = run_scenario(workload, name, args.iterations)
+            print(f"{name:<18}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['queries']:>10}{result['peak_kib']:>11}")
+
+    dataset = {'users': args.users, 'notes_per_user': args.notes_per_user, 'categories': args.categories, 'seed': args.seed}
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'dataset': dataset, 'results': results}, f, indent=2)
+        print(f'Saved baseline to {args.baseline}', file=sys.stderr)
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('dataset') != dataset:
+            print(f"Warning: baseline was recorded with dataset {baseline.get('dataset')}", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f'REGRESSION {message}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
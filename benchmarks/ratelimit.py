@@ -0,0 +1,77 @@
+"""
+Rate limiter storage benchmark for Flask Notes app.
+Measures the cost of one limit check (hit) and the memory or disk used per storage
+and strategy, with many distinct client keys.
+
+    python -m benchmarks.ratelimit --keys 10000
+    python -m benchmarks.ratelimit --storage memory --strategy moving-window --strategy sliding-window-counter
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+from limits import parse, storage as limits_storage, strategies
+
+# Get the parent directory (necessary for imports)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models import limiter_storage  # noqa: E402,F401 (registers the sqlite:// scheme)
+from benchmarks.workload import percentile  # noqa: E402
+
+STORAGES = ('memory', 'sqlite')
+STRATEGIES = ('fixed-window', 'moving-window', 'sliding-window-counter')
+
+def run(storage_uri, strategy, keys, hits_per_key, limit):
+    """Hit a limit for every key and return latency percentiles (µs) and memory/disk growth (KiB)."""
+    storage = limits_storage.storage_from_string(storage_uri)
+    limiter = strategies.STRATEGIES[strategy](storage)
+    item = parse(limit)
+    client_keys = [f'10.{n // 65536}.{n // 256 % 256}.{n % 256}' for n in range(keys)]
+
+    # Preallocated, so only the storage shows up in the traced memory
+    latencies = array('d', bytes(8 * keys * hits_per_key))
+    tracemalloc.start()
+    for i in range(hits_per_key):
+        for n, key in enumerate(client_keys):
+            start = time.perf_counter()
+            limiter.hit(item, key)
+            latencies[i * keys + n] = (time.perf_counter() - start) * 1e6
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    disk = 0
+    if getattr(storage, 'path', None):
+        disk = sum(os.path.getsize(storage.path + suffix) for suffix in ('', '-wal') if os.path.exists(storage.path + suffix))
+    return {
+        'p50_us': percentile(latencies, 50),
+        'p95_us': percentile(latencies, 95),
+        'p99_us': percentile(latencies, 99),
+        'memory_kib': round(memory / 1024, 1),
+        'disk_kib': round(disk / 1024, 1),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark rate limit storages and strategies.')
+    parser.add_argument('--keys', type=int, default=10000, help='Distinct client keys')
+    parser.add_argument('--hits-per-key', type=int, default=5)
+    parser.add_argument('--limit', default='50 per minute', help='Limit checked on every hit (the default limit)')
+    parser.add_argument('--storage', action='append', choices=STORAGES, help='Run only these storages (repeatable)')
+    parser.add_argument('--strategy', action='append', choices=STRATEGIES, help='Run only these strategies (repeatable)')
+    args = parser.parse_args(argv)
+
+    print(f"{'storage':<9}{'strategy':<24}{'p50 µs':>9}{'p95 µs':>9}{'p99 µs':>9}{'memory KiB':>12}{'disk KiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for storage in args.storage or STORAGES:
+            for strategy in args.strategy or STRATEGIES:
+                uri = 'memory://' if storage == 'memory' else f"sqlite:///{os.path.join(tmp_dir, f'{strategy}.db')}"
+                result = run(uri, strategy, args.keys, args.hits_per_key, args.limit)
+                print(f"{storage:<9}{strategy:<24}{result['p50_us']:>9.1f}{result['p95_us']:>9.1f}{result['p99_us']:>9.1f}"
+                      f"{result['memory_kib']:>12}{result['disk_kib']:>10}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
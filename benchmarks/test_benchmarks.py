@@ -0,0 +1,35 @@
+"""
+pytest-benchmark suite for the core endpoints (not part of the regular test run).
+
+    pip install pytest-benchmark
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:25%
+
+Set BENCHMARK_USERS, BENCHMARK_NOTES_PER_USER and BENCHMARK_CATEGORIES to change the dataset size.
+"""
+import os
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from benchmarks.workload import SCENARIOS, Workload, create_benchmark_app, populate  # noqa: E402
+
+@pytest.fixture(scope='module')
+def workload(tmp_path_factory):
+    """Workload on a synthetic SQLite dataset shared by all benchmarks in this module."""
+    database = tmp_path_factory.mktemp('benchmark') / 'benchmark.db'
+    app = create_benchmark_app(f'sqlite:///{database}')
+    usernames = populate(
+        app,
+        int(os.getenv('BENCHMARK_USERS', 5)),
+        int(os.getenv('BENCHMARK_NOTES_PER_USER', 2000)),
+        int(os.getenv('BENCHMARK_CATEGORIES', 10))
+    )
+    return Workload(app, usernames[0])
+
+@pytest.mark.parametrize('scenario', SCENARIOS)
+def test_endpoint(benchmark, workload, scenario):
+    """Benchmark one request scenario."""
+    response = benchmark(getattr(workload, scenario))
+    assert response.status_code < 400
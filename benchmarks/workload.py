@@ -0,0 +1,136 @@
+"""
+Benchmark workload for Flask Notes app.
+Builds an app on a synthetic dataset and defines the measured scenarios, shared by
+the standalone load driver (benchmarks/load.py) and the pytest-benchmark suite.
+"""
+import math
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+# Get the parent directory (necessary for imports)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from models.database import db, Note, User
+from models.db_utils import generate_synthetic_data, SYNTHETIC_WORDS
+
+PASSWORD = 'benchmark'
+
+def create_benchmark_app(database_uri, **config):
+    """Create an app for benchmarking (CSRF, reCAPTCHA and rate limits off, like the tests)."""
+    return create_app(config={
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_ENABLED': False,
+        **config
+    })
+
+def populate(app, users, notes_per_user, categories, seed=0):
+    """Create the schema and synthetic data unless the database already has the users; return the usernames."""
+    with app.app_context():
+        db.create_all()
+        if db.session.scalar(db.select(User.id).where(User.username == f'synthetic_{seed}_0')) is not None:
+            return [f'synthetic_{seed}_{n}' for n in range(users)]
+        return generate_synthetic_data(users, notes_per_user, categories, seed=seed, password=PASSWORD)
+
+class Workload:
+    """Logged-in test clients and request scenarios for one benchmark user."""
+
+    def __init__(self, app, username):
+        self.app = app
+        self.username = username
+        with app.app_context():
+            user = db.session.scalar(db.select(User).where(User.username == username))
+            self.user_id = user.id
+            self.note_id = db.session.scalar(db.select(Note.id).where(Note.user_id == user.id).order_by(Note.id))
+            self.note_count = db.session.scalar(db.select(db.func.count(Note.id)).where(Note.user_id == user.id, Note.archived.is_(False)))
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.user_id)
+            sess['_fresh'] = True
+        self.counter = 0
+
+    def index(self):
+        return self.client.get('/notes/')
+
+    def index_deep_page(self):
+        # Middle page of the list, the worst case for OFFSET pagination
+        return self.client.get(f'/notes/?page={max(1, self.note_count // 6 // 2)}')
+
+    def search(self):
+        self.counter += 1
+        return self.client.get(f'/notes/?search={SYNTHETIC_WORDS[self.counter % len(SYNTHETIC_WORDS)]}')
+
+    def api_list(self):
+        return self.client.get('/api/v1/notes')
+
+    def add(self):
+        self.counter += 1
+        return self.client.post('/notes/add', data={'title': f'Benchmark {self.counter}', 'content': 'Benchmark note content', 'category_id': 0})
+
+    def update(self):
+        self.counter += 1
+        return self.client.post(f'/notes/update/{self.note_id}', data={'title': f'Updated {self.counter}', 'content': 'Updated content', 'category_id': 0})
+
+    def login(self):
+        # A fresh client per login, so the session starts anonymous
+        with self.app.test_client() as client:
+            return client.post('/auth/login', data={'username': self.username, 'password': PASSWORD})
+
+SCENARIOS = ('index', 'index_deep_page', 'search', 'api_list', 'add', 'update', 'login')
+
+@contextmanager
+def count_queries(engine):
+    """Count SQL statements executed on an engine."""
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+def run_scenario(workload, name, iterations, warmup=3):
+    """Run a scenario and return latency percentiles (ms), queries per request and peak memory (KiB)."""
+    request = getattr(workload, name)
+    with workload.app.app_context():
+        engine = db.engine
+
+    # Requests run outside an app context, so each gets its own like in production
+    for _ in range(warmup):
+        request()
+
+    latencies = []
+    with count_queries(engine) as statements:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name} failed with status {response.status_code}')
+
+    # Memory is measured in a separate request, since tracing slows everything down
+    tracemalloc.start()
+    request()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'queries': round(len(statements) / iterations, 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
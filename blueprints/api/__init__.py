@@ -0,0 +1,285 @@
+"""
+API Blueprint for Flask Notes app.
+Versioned JSON API for notes with ETag based conditional requests.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from flask import Blueprint, request, jsonify, abort
+from flask_login import current_user
+from werkzeug.datastructures import MultiDict
+from models.database import db, Note, attach_categories
+from models.forms import NoteForm
+from models.pagination import KeysetPagination, InvalidCursor
+from models.cache import get_categories
+from blueprints.notes import filter_notes
+
+# Create API blueprint
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_BULK_IDS = 1000
+MAX_IMPORT_NOTES = 1000
+BULK_ACTIONS = ('archive', 'unarchive', 'delete', 'recategorize')
+
+def api_login_required(view):
+    """Return 401 JSON instead of redirecting to the login page."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify(error='Authentication required.'), 401
+        return view(*args, **kwargs)
+    return wrapped
+
+@bp.errorhandler(400)
+@bp.errorhandler(404)
+@bp.errorhandler(412)
+def api_error(e):
+    """Render HTTP errors raised in API views as JSON."""
+    return jsonify(error=e.description), e.code
+
+def compute_etag(data):
+    """Strong ETag over a JSON representation (changes whenever updated_at or the payload changes)."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:32]
+
+def is_id(value):
+    """Return True for JSON integers (true/false decode to bool, which is an int subclass)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def get_user_note(note_id):
+    """Load a note of the current user or abort with 404."""
+    note = db.session.get(Note, note_id)
+    if not note or note.user_id != current_user.id:
+        abort(404, description='Note not found.')
+    return note
+
+def check_if_match(note):
+    """Enforce If-Match preconditions for optimistic concurrency."""
+    # Weak comparison, since gzipped responses carry the weakened form of the same ETag
+    if request.if_match and not request.if_match.contains_weak(compute_etag(note.to_dict())):
+        abort(412, description='Note was modified by another request.')
+
+def note_response(note, status=200):
+    """Build a JSON response for a note with ETag and Last-Modified, answering 304 when unchanged."""
+    data = note.to_dict()
+    response = jsonify(data)
+    response.status_code = status
+    response.set_etag(compute_etag(data))
+    response.last_modified = note.updated_at
+    if status == 200:
+        response.make_conditional(request)
+    return response
+
+def note_form():
+    """Build a NoteForm from the JSON request body (CSRF is checked by CSRFProtect for the request)."""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        abort(400, description='Request body must be a JSON object.')
+    title, content, category_id = payload.get('title'), payload.get('content'), payload.get('category_id')
+    # Missing fields are reported by the form validators; other JSON types never reach the form
+    if not all(value is None or isinstance(value, str) for value in (title, content)):
+        abort(400, description="'title' and 'content' must be strings.")
+    if not (category_id is None or is_id(category_id)):
+        abort(400, description="'category_id' must be an integer.")
+    formdata = MultiDict({
+        'title': title or '',
+        'content': content or '',
+        'category_id': category_id or 0
+    })
+    return NoteForm(formdata=formdata, meta={'csrf': False})
+
+@bp.route("/notes", methods=["GET"])
+@api_login_required
+def list_notes():
+    """List notes with the notes.index filters, paginated by cursor (or page number for searches)."""
+    search_query = request.args.get('search', '').strip()
+    show_archived = request.args.get('archived', 'false').lower() == 'true'
+    category_filter = request.args.get('category', type=int)
+    limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+    count = request.args.get('count', 'true').lower() == 'true'
+
+    query = filter_notes(current_user.id, search_query, show_archived, category_filter)
+    if search_query:
+        # Relevance-ranked results are paged by number
+        page = request.args.get('page', 1, type=int)
+        pagination = query.order_by(Note.updated_at.desc(), Note.id.desc()).paginate(page=page, per_page=limit, error_out=False)
+        next_cursor = prev_cursor = None
+        meta = {'page': pagination.page, 'pages': pagination.pages}
+    else:
+        try:
+            pagination = KeysetPagination(query, [Note.updated_at, Note.id], limit, cursor=request.args.get('cursor'), descending=True, count=count)
+        except InvalidCursor:
+            abort(400, description='Invalid cursor.')
+        next_cursor, prev_cursor = pagination.next_cursor, pagination.prev_cursor
+        meta = {}
+
+    attach_categories(pagination.items, get_categories(current_user.id))
+    data = {
+        'notes': [note.to_dict() for note in pagination.items],
+        'total': pagination.total,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        **meta
+    }
+    response = jsonify(data)
+    response.set_etag(compute_etag(data))
+    return response.make_conditional(request)
+
+@bp.route("/notes/<int:note_id>", methods=["GET"])
+@api_login_required
+def get_note(note_id: int):
+    """Get a single note, answering 304 if the client copy is current."""
+    return note_response(get_user_note(note_id))
+
+@bp.route("/notes", methods=["POST"])
+@api_login_required
+def create_note():
+    """Create a note from JSON data."""
+    form = note_form()
+    if not form.validate():
+        return jsonify(errors=form.errors), 400
+
+    category_id = form.category_id.data if form.category_id.data != 0 else None
+    note = Note(title=form.title.data, content=form.content.data, category_id=category_id, user_id=current_user.id)
+    db.session.add(note)
+    db.session.commit()
+    response = note_response(note, status=201)
+    response.headers['Location'] = f"{request.base_url}/{note.id}"
+    return response
+
+@bp.route("/notes/<int:note_id>", methods=["PUT"])
+@api_login_required
+def update_note(note_id: int):
+    """Replace a note's title, content and category; honours If-Match."""
+    note = get_user_note(note_id)
+    check_if_match(note)
+
+    form = note_form()
+    if not form.validate():
+        return jsonify(errors=form.errors), 400
+
+    note.title = form.title.data
+    note.content = form.content.data
+    note.category_id = form.category_id.data if form.category_id.data != 0 else None
+    db.session.commit()
+    return note_response(note)
+
+@bp.route("/notes/<int:note_id>", methods=["DELETE"])
+@api_login_required
+def delete_note(note_id: int):
+    """Delete a note; honours If-Match."""
+    note = get_user_note(note_id)
+    check_if_match(note)
+    db.session.delete(note)
+    db.session.commit()
+    return '', 204
+
+@bp.route("/notes/<int:note_id>/archive", methods=["POST"])
+@api_login_required
+def archive_note(note_id: int):
+    """Archive or unarchive a note (JSON body {"archived": bool}, defaults to true)."""
+    note = get_user_note(note_id)
+    check_if_match(note)
+    payload = request.get_json(silent=True)
+    payload = {} if payload is None else payload  # An empty body archives
+    if not isinstance(payload, dict):
+        abort(400, description='Request body must be a JSON object.')
+    archived = payload.get('archived', True)
+    if not isinstance(archived, bool):
+        abort(400, description="'archived' must be true or false.")
+    note.archived = archived
+    db.session.commit()
+    return note_response(note)
+
+def bulk_condition(payload):
+    """Build the WHERE condition for a bulk action from explicit 'ids' or a notes.index style 'filter'."""
+    if 'ids' in payload:
+        ids = payload['ids']
+        if not isinstance(ids, list) or not all(is_id(note_id) for note_id in ids):
+            abort(400, description="'ids' must be a list of integers.")
+        if len(ids) > MAX_BULK_IDS:
+            abort(400, description=f"At most {MAX_BULK_IDS} ids per request.")
+        return Note.id.in_(ids)
+
+    filters = payload.get('filter')
+    if not isinstance(filters, dict):
+        abort(400, description="Provide either 'ids' or 'filter'.")
+    category_filter = filters.get('category')
+    if category_filter is not None and not is_id(category_filter):
+        abort(400, description="'filter.category' must be an integer.")
+    archived = filters.get('archived', False)
+    if not isinstance(archived, bool):
+        abort(400, description="'filter.archived' must be true or false.")
+    query = filter_notes(current_user.id, str(filters.get('search') or '').strip(), archived, category_filter)
+    return Note.id.in_(query.with_entities(Note.id).order_by(None).statement)
+
+@bp.route("/notes/bulk", methods=["POST"])
+@api_login_required
+def bulk_notes():
+    """Archive, unarchive, delete or recategorize many notes with one set-based statement.
+
+    JSON body: {"action": ..., "ids": [...]} or {"action": ..., "filter": {"search", "archived", "category"}},
+    plus "category_id" (0 or null for none) when recategorizing.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or payload.get('action') not in BULK_ACTIONS:
+        abort(400, description=f"'action' must be one of: {', '.join(BULK_ACTIONS)}.")
+    action = payload['action']
+    target = bulk_condition(payload)
+
+    if action == 'delete':
+        statement = db.delete(Note).where(Note.user_id == current_user.id, target)
+    else:
+        if action == 'recategorize':
+            category_id = payload.get('category_id')
+            if category_id is not None and not (is_id(category_id) and (category_id == 0 or category_id in {category.id for category in get_categories(current_user.id)})):
+                abort(400, description='Category not found.')
+            values = {'category_id': category_id or None}
+        else:
+            values = {'archived': action == 'archive'}
+        statement = db.update(Note).where(Note.user_id == current_user.id, target).values(**values)
+
+    result = db.session.execute(statement.execution_options(synchronize_session=False))
+    db.session.commit()
+    return jsonify(action=action, affected=result.rowcount)
+
+@bp.route("/notes/import", methods=["POST"])
+@api_login_required
+def import_notes():
+    """Create many notes with a single bulk INSERT.
+
+    JSON body: {"notes": [{"title", "content", "category_id"}, ...]}. All notes are
+    validated first; nothing is inserted if any of them is invalid.
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get('notes') if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        abort(400, description="'notes' must be a non-empty list.")
+    if len(items) > MAX_IMPORT_NOTES:
+        abort(400, description=f"At most {MAX_IMPORT_NOTES} notes per request.")
+
+    # Same rules as NoteForm (DataRequired rejects whitespace-only values), checked without building one form per note
+    category_ids = {category.id for category in get_categories(current_user.id)}
+    rows, errors = [], {}
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        title, content = item.get('title'), item.get('content')
+        category_id = item.get('category_id')
+        if not isinstance(title, str) or not title.strip():
+            errors[index] = 'Title is required.'
+        elif len(title) > 200:
+            errors[index] = 'Title must be between 1 and 200 characters long.'
+        elif not isinstance(content, str) or not content.strip():
+            errors[index] = 'Content is required.'
+        elif category_id is not None and not (is_id(category_id) and (category_id == 0 or category_id in category_ids)):
+            errors[index] = 'Not a valid choice.'
+        else:
+            rows.append({'title': title, 'content': content, 'category_id': category_id or None, 'user_id': current_user.id, 'archived': False})
+    if errors:
+        return jsonify(errors=errors), 400
+
+    db.session.execute(db.insert(Note), rows)
+    db.session.commit()
+    return jsonify(imported=len(rows)), 201
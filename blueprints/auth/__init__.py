@@ -8,6 +8,7 @@ from flask_babel import gettext as translate
 from models.database import db, User
 from models.forms import LoginForm, RegistrationForm
 from models.limiter import limiter
+from models import hashing
 
 # Create auth blueprint
 bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -37,6 +38,10 @@ def login():
 
         user = User.query.filter_by(username=username).one_or_none()
         if user and user.check_password(password):
+            # Upgrade hashes created with older parameters while the plain password is at hand
+            if hashing.needs_rehash(user.password_hash):
+                user.set_password(password)
+                db.session.commit()
             login_user(user)
 
             next_page = request.args.get('next')
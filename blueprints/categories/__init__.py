@@ -7,6 +7,8 @@ from flask_login import login_required, current_user
 from flask_babel import gettext as translate
 from models.database import db, Category, Note
 from models.forms import CategoryForm
+from models.pagination import paginate
+from models.cache import invalidate_categories
 
 # Create categories blueprint
 bp = Blueprint('categories', __name__, url_prefix='/categories')
@@ -15,7 +17,6 @@ bp = Blueprint('categories', __name__, url_prefix='/categories')
 @login_required
 def index():
     """Render the categories management page with pagination and search."""
-    page = request.args.get('page', 1, type=int)
     search_query = request.args.get('search', '').strip()
     per_page = 10
 
@@ -24,24 +25,28 @@ def index():
     if search_query:
         query = query.filter(Category.name.contains(search_query))
 
-    # Get paginated categories (using SQLAlchemy's built-in pagination)
-    pagination = query.order_by(Category.name).paginate(page=page, per_page=per_page, error_out=False)
+    # Get paginated categories ordered by name (cursor or page number)
+    pagination = paginate(query, [Category.name, Category.id], per_page)
 
     category_form = CategoryForm()
 
-    # Count notes for each category
-    category_counts = {}
-    for category in pagination.items:
-        category_counts[category.id] = Note.query.filter_by(user_id=current_user.id, category_id=category.id, archived=False).count()
-
-    # Count notes without category
-    uncategorized_count = Note.query.filter_by(user_id=current_user.id, category_id=None, archived=False).count()
+    # Count active notes for the categories on this page and uncategorized notes in one grouped query
+    category_ids = [category.id for category in pagination.items]
+    counts = (db.session.query(Note.category_id, db.func.count(Note.id))
+        .filter_by(user_id=current_user.id, archived=False)
+        .filter(db.or_(Note.category_id.in_(category_ids), Note.category_id.is_(None)))
+        .group_by(Note.category_id)
+        .all())
+    category_counts = dict(counts)
+    uncategorized_count = category_counts.pop(None, 0)
 
     return render_template("categories/categories.html",
         categories=pagination.items,
         current_page=pagination.page,
         total_pages=pagination.pages,
         total_categories=pagination.total,
+        next_cursor=pagination.next_cursor,
+        prev_cursor=pagination.prev_cursor,
         search_query=search_query,
         category_form=category_form,
         category_counts=category_counts,
@@ -58,6 +63,7 @@ def add():
         new_category = Category(name=form.name.data, color=form.color.data, user_id=current_user.id)
         db.session.add(new_category)
         db.session.commit()
+        invalidate_categories(current_user.id)
         flash(translate('Category successfully created!'), 'success')
     else:
         # Flash validation errors
@@ -81,6 +87,7 @@ def update(category_id: int):
         category.name = form.name.data
         category.color = form.color.data
         db.session.commit()
+        invalidate_categories(current_user.id)
         flash(translate('Category successfully updated!'), 'success')
     else:
         # Flash validation errors
@@ -98,13 +105,12 @@ def delete(category_id: int):
     if not category or category.user_id != current_user.id:
         abort(404)
 
-    # Set category_id to None for all notes in this category
-    notes = Note.query.filter_by(category_id=category_id, user_id=current_user.id).all()
-    for note in notes:
-        note.category_id = None
+    # Set category_id to None for all notes in this category with a single UPDATE
+    db.session.execute(db.update(Note).where(Note.category_id == category_id, Note.user_id == current_user.id).values(category_id=None))
 
     db.session.delete(category)
     db.session.commit()
+    invalidate_categories(current_user.id)
     flash(translate('Category successfully deleted! Associated notes are now uncategorized.'), 'success')
 
     return redirect(url_for("categories.index"))
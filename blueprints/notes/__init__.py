@@ -5,48 +5,66 @@ Handles all note-related operations (CRUD).
 from flask import Blueprint, render_template, request, redirect, url_for, abort, flash
 from flask_login import login_required, current_user
 from flask_babel import gettext as translate
-from models.database import db, Note, Category
+from models.database import db, Note, attach_categories
+from models.cache import get_categories
+from models.response_cache import cached_page
 from models.forms import NoteForm
+from models.search import apply_search
+from models.pagination import paginate
 
 # Create notes blueprint
 bp = Blueprint('notes', __name__, url_prefix='/notes')
 
+def filter_notes(user_id, search_query='', show_archived=False, category_filter=None):
+    """Build the query for a user's notes with the notes.index search, archive and category filters."""
+    # Build query with search filter for the user's notes only
+    query = Note.query.filter_by(user_id=user_id).filter(Note.archived==show_archived)
+    if search_query:
+        query = apply_search(query, search_query, user_id)  # Full-text search, ranked by relevance
+
+    # Apply category filter
+    if category_filter is not None:
+        if category_filter == 0:  # "No Category" filter
+            query = query.filter(Note.category_id.is_(None))
+        else:
+            query = query.filter(Note.category_id == category_filter)
+
+    return query
+
 @bp.route("/")
 @login_required
+@cached_page
 def index():
     """Render the index page with paginated notes for current user."""
-    page = request.args.get('page', 1, type=int)
     search_query = request.args.get('search', '').strip()
     show_archived = request.args.get('archived', 'false').lower() == 'true'
     category_filter = request.args.get('category', type=int)
     per_page = 6
 
-    # Build query with search filter for current user's notes only
-    query = Note.query.filter_by(user_id=current_user.id).filter(Note.archived==show_archived)
-    if search_query:
-        query = query.filter(db.or_(Note.title.contains(search_query), Note.content.contains(search_query)))
+    query = filter_notes(current_user.id, search_query, show_archived, category_filter)
 
-    # Apply category filter
-    if category_filter is not None:
-        if category_filter == 0:  # "No Category" filter
-            query = query.filter(Note.category_id.is_(None))
-        else:
-            query = query.filter(Note.category_id == category_filter)
+    # Load previews only; the full content is fetched on demand by the view/edit modals
+    query = query.options(db.defer(Note.content), db.undefer(Note.preview), db.undefer(Note.content_length))
 
-    # Get paginated notes (using SQLAlchemy's built-in pagination)
-    pagination = query.order_by(Note.updated_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    # Get paginated notes, newest first (relevance-ranked searches always use page numbers)
+    pagination = paginate(query, [Note.updated_at, Note.id], per_page, descending=True, allow_keyset=not search_query)
 
     # Create form for adding new notes
     notes_form = NoteForm()
 
-    # Get categories for filter dropdown
-    categories = Category.query.filter_by(user_id=current_user.id).order_by(Category.name).all()
+    # Get categories for filter dropdown (shared with the form through the category cache)
+    categories = get_categories(current_user.id)
+
+    # Reuse the categories for the note cards instead of lazy-loading one per note
+    attach_categories(pagination.items, categories)
 
     return render_template("notes/notes.html",
         notes=pagination.items,
         current_page=pagination.page,
         total_pages=pagination.pages,
         total_notes=pagination.total,
+        next_cursor=pagination.next_cursor,
+        prev_cursor=pagination.prev_cursor,
         search_query=search_query,
         show_archived=show_archived,
         category_filter=category_filter,
@@ -136,7 +154,8 @@ def archive(note_id: int, archive: bool):
     current_archived = request.args.get('archived', 'false').lower() == 'true'
     category_filter = request.args.get('category', type=int)
     page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     redirect_archived = current_archived if archive else current_archived
 
-    return redirect(url_for("notes.index", search=search_query if search_query else None, archived=redirect_archived if redirect_archived else None, category=category_filter, page=page))
+    return redirect(url_for("notes.index", search=search_query if search_query else None, archived=redirect_archived if redirect_archived else None, category=category_filter, page=page, cursor=cursor))
 
@@ -0,0 +1,46 @@
+"""Add full-text search index for notes
+
+Revision ID: c3d9e2a17f40
+Revises: 530f8d465e67
+Create Date: 2026-10-17 10:12:41.204518
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d9e2a17f40'
+down_revision = '530f8d465e67'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # FTS5 external content table, kept in sync with notes by triggers
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+                   "title, content, content='notes', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+        op.execute("CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN "
+                   "INSERT INTO notes_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END")
+        op.execute("CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN "
+                   "INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); END")
+        op.execute("CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF title, content ON notes BEGIN "
+                   "INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+                   "INSERT INTO notes_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END")
+        # Backfill existing notes
+        op.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE INDEX IF NOT EXISTS ix_notes_search_vector ON notes USING gin "
+                   "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(content, '')))")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS notes_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS notes_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS notes_fts_ai")
+        op.execute("DROP TABLE IF EXISTS notes_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_notes_search_vector")
@@ -0,0 +1,34 @@
+"""Add composite indexes for notes and categories
+
+Revision ID: e5b7a0c4d912
+Revises: c3d9e2a17f40
+Create Date: 2026-10-17 11:03:27.518094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b7a0c4d912'
+down_revision = 'c3d9e2a17f40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.create_index('ix_notes_user_id_archived_updated_at', ['user_id', 'archived', sa.text('updated_at DESC'), sa.text('id DESC')], unique=False)
+        batch_op.create_index('ix_notes_user_id_category_id_archived', ['user_id', 'category_id', 'archived'], unique=False)
+
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.create_index('ix_categories_user_id_name', ['user_id', 'name'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.drop_index('ix_categories_user_id_name')
+
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.drop_index('ix_notes_user_id_category_id_archived')
+        batch_op.drop_index('ix_notes_user_id_archived_updated_at')
@@ -0,0 +1,262 @@
+"""
+Static asset pipeline and response compression for Flask Notes app.
+Fingerprints static URLs with a content hash, serves fingerprinted files with
+long-lived cache headers, prefers precompressed .br/.gz variants and gzips
+large dynamic HTML/JSON responses on the fly. Also builds a self-hosted
+frontend bundle as an alternative to the CDN assets.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import urllib.request
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, only needed to generate .br files
+    brotli = None
+
+try:
+    import rjsmin
+    import rcssmin
+except ImportError:  # Optional dependencies, bundles are only concatenated without them
+    rjsmin = rcssmin = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.html', '.txt', '.map')
+COMPRESSIBLE_MIMETYPES = ('text/html', 'application/json')
+# Precompressed variants in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Third-party frontend files vendored into static/vendor (relative path -> CDN URL)
+VENDOR_FILES = {
+    'bootstrap/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css',
+    'bootstrap/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js',
+    'bootstrap-icons/bootstrap-icons.css': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.css',
+    'bootstrap-icons/fonts/bootstrap-icons.woff2': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2',
+    'bootstrap-icons/fonts/bootstrap-icons.woff': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff',
+    'jquery/jquery.min.js': 'https://code.jquery.com/jquery-3.7.1.min.js',
+}
+
+# Bundle contents in load order: (path relative to static/, already minified)
+BUNDLE_CSS = [
+    ('vendor/bootstrap/bootstrap.min.css', True),
+    ('vendor/bootstrap-icons/bootstrap-icons.css', False),
+    ('css/base.css', False),
+]
+BUNDLE_JS = [
+    ('vendor/jquery/jquery.min.js', True),
+    ('vendor/bootstrap/bootstrap.bundle.min.js', True),
+    ('js/flask-flash.js', False),
+    ('js/darkmode.js', False),
+    ('js/notes.js', False),
+    ('js/categories.js', False),
+]
+BUNDLE_DIR = 'dist'
+
+# filename -> (mtime, hash)
+_fingerprints = {}
+
+def fingerprint(filename):
+    """Return a short content hash for a file in the static folder (cached until its mtime changes)."""
+    path = os.path.join(current_app.static_folder, filename)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _fingerprints.get(filename)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    _fingerprints[filename] = (mtime, digest)
+    return digest
+
+def add_fingerprint(endpoint, values):
+    """url_defaults hook adding ?v=<hash> to static URLs."""
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        digest = fingerprint(values['filename'])
+        if digest:
+            values['v'] = digest
+
+def accepted_encodings():
+    """Return the content codings the client accepts."""
+    return {value for value, quality in request.accept_encodings if quality > 0}
+
+def variant_is_fresh(filename, suffix):
+    """Return True if a precompressed variant exists and is not older than its source file."""
+    path = safe_join(current_app.static_folder, filename)
+    if path is None:
+        return False
+    try:
+        return os.path.getmtime(path + suffix) >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+def static_view(filename):
+    """Serve a static file, preferring a precompressed variant, with immutable caching when fingerprinted."""
+    accepted = accepted_encodings()
+    response = None
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and variant_is_fresh(filename, suffix):
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(current_app.static_folder, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = send_from_directory(current_app.static_folder, filename)
+    response.vary.add('Accept-Encoding')
+
+    # Fingerprinted URLs never change content, so browsers need not revalidate
+    version = request.args.get('v')
+    if version and version == fingerprint(filename):
+        response.headers['Cache-Control'] = IMMUTABLE
+    return response
+
+def compress_response(response):
+    """Gzip dynamic HTML/JSON responses above COMPRESS_MIN_SIZE for clients that accept it."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    if 'gzip' not in accepted_encodings():
+        return response
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=current_app.config['COMPRESS_LEVEL']))
+    response.headers['Content-Encoding'] = 'gzip'
+    # The body bytes changed, so a strong validator becomes weak (as nginx does)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+@click.command()
+@with_appcontext
+def compress_assets():
+    """Write gzip (and brotli, if installed) variants of text files under static/."""
+    count = 0
+    for root, _, files in os.walk(current_app.static_folder):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+            count += 1
+    click.echo(f'Compressed {count} static files (gzip{", brotli" if brotli else ""}).')
+    if brotli is None:
+        click.echo('Install "brotli" to also generate .br files.')
+
+def minify_css(css):
+    """Minify CSS with rcssmin, or strip comments and whitespace if it is not installed."""
+    if rcssmin is not None:
+        return rcssmin.cssmin(css)
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    return re.sub(r'\s+', ' ', css).strip()
+
+def minify_js(js):
+    """Minify JavaScript with rjsmin, or return it unchanged if it is not installed."""
+    return rjsmin.jsmin(js) if rjsmin is not None else js
+
+def read_bundle_part(path, minified, minify):
+    """Read one bundle input, minifying it unless it already is."""
+    with open(os.path.join(current_app.static_folder, path), encoding='utf-8') as f:
+        source = f.read()
+    if path == 'vendor/bootstrap-icons/bootstrap-icons.css':
+        # Fonts stay in the vendor folder; point the URLs there from static/dist/
+        source = source.replace('url("./fonts/', 'url("../vendor/bootstrap-icons/fonts/')
+    return source if minified else minify(source)
+
+def write_bundle(name, extension, content):
+    """Write a content-hashed bundle file into static/dist and return its filename."""
+    digest = hashlib.sha256(content.encode()).hexdigest()[:12]
+    filename = f'{name}.{digest}.{extension}'
+    with open(os.path.join(current_app.static_folder, BUNDLE_DIR, filename), 'w', encoding='utf-8') as f:
+        f.write(content)
+    return filename
+
+@click.command()
+@click.option('--offline', is_flag=True, help='Do not download missing vendor files.')
+@click.option('--refresh', is_flag=True, help='Download vendor files even if they exist.')
+@with_appcontext
+def build_assets(offline, refresh):
+    """Vendor the CDN frontend libraries and build one hashed CSS and JS bundle."""
+    vendor_dir = os.path.join(current_app.static_folder, 'vendor')
+    missing = []
+    for path, url in VENDOR_FILES.items():
+        target = os.path.join(vendor_dir, path)
+        if os.path.exists(target) and not refresh:
+            continue
+        if offline:
+            missing.append(path)
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        click.echo(f'Downloading {url}')
+        with urllib.request.urlopen(url, timeout=30) as response, open(target, 'wb') as f:
+            f.write(response.read())
+    if missing:
+        raise click.ClickException(f'Missing vendor files (run without --offline): {", ".join(missing)}')
+
+    dist_dir = os.path.join(current_app.static_folder, BUNDLE_DIR)
+    os.makedirs(dist_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(dist_dir, 'bundle.*')):
+        os.remove(old)
+
+    css = '\n'.join(read_bundle_part(path, minified, minify_css) for path, minified in BUNDLE_CSS)
+    js = ';\n'.join(read_bundle_part(path, minified, minify_js) for path, minified in BUNDLE_JS)
+    manifest = {'bundle.css': write_bundle('bundle', 'css', css), 'bundle.js': write_bundle('bundle', 'js', js)}
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    current_app.extensions.pop('asset_bundle', None)
+    click.echo(f'Built {manifest["bundle.css"]} and {manifest["bundle.js"]}.')
+
+def load_bundle_manifest(app):
+    """Read static/dist/manifest.json, or return None if the bundle has not been built."""
+    try:
+        with open(os.path.join(app.static_folder, BUNDLE_DIR, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def bundle_assets():
+    """Return static paths of the built bundle when FRONTEND_ASSETS is 'local', or None to use the CDN."""
+    app = current_app
+    if app.config['FRONTEND_ASSETS'] != 'local':
+        return None
+    if 'asset_bundle' not in app.extensions:
+        manifest = load_bundle_manifest(app)
+        if manifest is None:
+            app.logger.warning('FRONTEND_ASSETS=local but no bundle was built (run "flask build-assets"); using CDN assets.')
+        app.extensions['asset_bundle'] = {name: f'{BUNDLE_DIR}/{filename}' for name, filename in manifest.items()} if manifest else None
+    return app.extensions['asset_bundle']
+
+def init_app(app):
+    """Register the asset pipeline, response compression, frontend bundle and CLI commands."""
+    if app.config['ASSET_FINGERPRINTING']:
+        app.url_defaults(add_fingerprint)
+    app.view_functions['static'] = static_view
+    if app.config['COMPRESS_RESPONSES']:
+        app.after_request(compress_response)
+    app.cli.add_command(compress_assets)
+    app.cli.add_command(build_assets)
+
+    @app.context_processor
+    def inject_bundle():
+        return dict(ASSET_BUNDLE=bundle_assets())
@@ -0,0 +1,169 @@
+"""
+Caching utilities for Flask Notes app.
+Provides a thread-safe LRU cache with TTL, the per-user category cache and the
+cached user principal used by the Flask-Login user loader.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from models.database import db, Category, User
+from models import metrics
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry time to live."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+def get_categories(user_id):
+    """Return the user's categories ordered by name.
+
+    Cached for the current request, and across requests for CATEGORY_CACHE_TTL
+    seconds when enabled (cached rows are merged back into the session without SQL).
+    """
+    request_cache = g.setdefault('_categories', {})
+    if user_id in request_cache:
+        return request_cache[user_id]
+
+    shared_cache = current_app.extensions.get('category_cache')
+    rows = shared_cache.get(user_id) if shared_cache is not None else None
+    if shared_cache is not None:
+        metrics.inc('flask_notes_cache_requests_total', cache='category', result='miss' if rows is None else 'hit')
+    if rows is None:
+        categories = Category.query.filter_by(user_id=user_id).order_by(Category.name).all()
+        if shared_cache is not None:
+            shared_cache.set(user_id, [category_row(category) for category in categories])
+    else:
+        categories = [merge_category_row(row) for row in rows]
+
+    request_cache[user_id] = categories
+    return categories
+
+def category_row(category):
+    """Serialize a category to a plain dict for the cross-request cache."""
+    return {column.key: getattr(category, column.key) for column in Category.__table__.columns}
+
+def merge_category_row(row):
+    """Turn a cached category row back into a persistent instance without querying."""
+    category = Category(**row)
+    make_transient_to_detached(category)
+    return db.session.merge(category, load=False)
+
+def invalidate_categories(user_id):
+    """Drop cached categories for a user after a category was added, changed or deleted."""
+    g.get('_categories', {}).pop(user_id, None)
+    shared_cache = current_app.extensions.get('category_cache')
+    if shared_cache is not None:
+        shared_cache.delete(user_id)
+
+class UserPrincipal:
+    """Lightweight authenticated identity for Flask-Login (no password hash, no session state)."""
+
+    __slots__ = ('id', 'username')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    def get_id(self):
+        return str(self.id)
+
+    def __eq__(self, other):
+        return isinstance(other, (UserPrincipal, User)) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f'<UserPrincipal {self.username}>'
+
+def load_user(user_id):
+    """Return the user for Flask-Login.
+
+    With USER_CACHE_TTL set, returns a UserPrincipal cached across requests (loaded
+    with a two-column query on a miss); otherwise the full User model.
+    """
+    user_cache = current_app.extensions.get('user_cache')
+    if user_cache is None:
+        return db.session.get(User, user_id)
+
+    principal = user_cache.get(user_id)
+    if principal is None:
+        row = db.session.execute(db.select(User.id, User.username).where(User.id == user_id)).first()
+        if row is None:
+            return None
+        principal = UserPrincipal(row.id, row.username)
+        user_cache.set(user_id, principal)
+    return principal
+
+def invalidate_user(user_id):
+    """Drop a cached principal, e.g. after a password change or deletion."""
+    user_cache = current_app.extensions.get('user_cache') if has_app_context() else None
+    if user_cache is not None:
+        user_cache.delete(user_id)
+
+@event.listens_for(User, 'after_update')
+def user_updated(mapper, connection, user):
+    state = inspect(user)
+    if state.attrs.password_hash.history.has_changes() or state.attrs.username.history.has_changes():
+        invalidate_user(user.id)
+
+@event.listens_for(User, 'after_delete')
+def user_deleted(mapper, connection, user):
+    invalidate_user(user.id)
+
+def init_app(app):
+    """Set up the cross-request category and user caches and reset the request cache after each request."""
+    ttl = app.config.get('CATEGORY_CACHE_TTL', 0)
+    app.extensions['category_cache'] = LRUCache(app.config.get('CATEGORY_CACHE_SIZE', 1024), ttl) if ttl > 0 else None
+    user_ttl = app.config.get('USER_CACHE_TTL', 0)
+    app.extensions['user_cache'] = LRUCache(app.config.get('USER_CACHE_SIZE', 10000), user_ttl) if user_ttl > 0 else None
+
+    @app.teardown_request
+    def clear_request_cache(exc):
+        g.pop('_categories', None)
@@ -2,11 +2,16 @@
 Database models for the Flask Notes app.
 """
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm.attributes import set_committed_value
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from models.replicas import RoutingSession
+from models import hashing
 from datetime import datetime, timezone
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Number of characters of note content shown in list views
+PREVIEW_LENGTH = 300
 
 def utc_now():
     """Return current UTC time using timezone-aware datetime."""
@@ -27,11 +32,11 @@ class User(UserMixin, db.Model):
 
     def set_password(self, password):
         """Set password hash."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hashing.hash_password(password)
 
     def check_password(self, password):
         """Check if provided password matches hash."""
-        return check_password_hash(self.password_hash, password)
+        return hashing.check_password(self.password_hash, password)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -49,6 +54,11 @@ class Category(db.Model):
     # Relationship to notes
     notes = db.relationship('Note', backref='category', lazy=True)
 
+    __table_args__ = (
+        # Listing and lookups by name per user (categories.index, NoteForm, CategoryForm)
+        db.Index('ix_categories_user_id_name', 'user_id', 'name', unique=True),
+    )
+
     def __repr__(self):
         return f'<Category {self.name}>'
 
@@ -74,6 +84,17 @@ class Note(db.Model):
     created_at = db.Column(db.DateTime, default=utc_now)
     updated_at = db.Column(db.DateTime, default=utc_now, onupdate=utc_now)
 
+    # Excerpt and length computed in SQL, so list views need not load the full content
+    preview = db.column_property(db.func.substr(content, 1, PREVIEW_LENGTH), deferred=True)
+    content_length = db.column_property(db.func.length(content), deferred=True)
+
+    __table_args__ = (
+        # Paginated listing per user and archive state, newest first with id as tie-breaker (notes.index)
+        db.Index('ix_notes_user_id_archived_updated_at', 'user_id', 'archived', db.desc('updated_at'), db.desc('id')),
+        # Filtering by category and counting notes per category (categories.index)
+        db.Index('ix_notes_user_id_category_id_archived', 'user_id', 'category_id', 'archived'),
+    )
+
     def __repr__(self):
         return f'<Note {self.id}: {self.title}>'
 
@@ -85,7 +106,14 @@ class Note(db.Model):
             'content': self.content,
             'category_id': self.category_id,
             'category': self.category.to_dict() if self.category else None,
+            'archived': bool(self.archived),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+def attach_categories(notes, categories):
+    """Populate note.category from an already loaded category list without extra queries."""
+    categories_by_id = {category.id: category for category in categories}
+    for note in notes:
+        set_committed_value(note, 'category', categories_by_id.get(note.category_id))
+    return notes
@@ -0,0 +1,67 @@
+"""
+Database engine tuning for Flask Notes app.
+Builds SQLALCHEMY_ENGINE_OPTIONS (connection pool sizing for server databases) and
+applies SQLite PRAGMAs (WAL, synchronous, busy timeout, mmap) to every new connection.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models.database import db
+from models import metrics
+
+SQLITE_JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SQLITE_SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+def is_memory_database(url):
+    """Check whether a SQLite URL points to an in-memory database."""
+    return url.database in (None, '', ':memory:') or url.database.startswith('file::memory:')
+
+def engine_options(config):
+    """Return SQLALCHEMY_ENGINE_OPTIONS for the configured database URI."""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    # SQLite uses a single static connection for :memory: and needs no sizing for files
+    if url.get_backend_name() != 'sqlite':
+        options.update(
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+        )
+    if config.get('METRICS_ENABLED'):
+        # Times connection checkouts (Flask-SQLAlchemy still uses its StaticPool for in-memory SQLite)
+        options['poolclass'] = metrics.timed_pool_class(url)
+    return options
+
+def sqlite_pragmas(config, url):
+    """Return the PRAGMA statements to run on each new SQLite connection."""
+    journal_mode = config['SQLITE_JOURNAL_MODE'].upper()
+    synchronous = config['SQLITE_SYNCHRONOUS'].upper()
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Unknown SQLITE_JOURNAL_MODE: {journal_mode}")
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Unknown SQLITE_SYNCHRONOUS: {synchronous}")
+
+    pragmas = [f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}", f"PRAGMA synchronous = {synchronous}"]
+    # WAL and mmap only apply to database files
+    if not is_memory_database(url):
+        pragmas.insert(0, f"PRAGMA journal_mode = {journal_mode}")
+        pragmas.append(f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}")
+    return pragmas
+
+def listen_sqlite_pragmas(engine, pragmas):
+    """Run the PRAGMAs whenever the engine opens a new DBAPI connection."""
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def init_app(app):
+    """Apply the SQLite PRAGMAs to the app's engines and replicas (call after db.init_app)."""
+    with app.app_context():
+        for engine in [*db.engines.values(), *app.extensions.get('replica_engines', [])]:
+            if engine.dialect.name == 'sqlite':
+                listen_sqlite_pragmas(engine, sqlite_pragmas(app.config, engine.url))
@@ -2,9 +2,26 @@
 Database utility script for Flask Notes app.
 This script provides commands to manage the database.
 """
+import random
+import time
+from datetime import timedelta
+
 import click
 from flask.cli import with_appcontext
-from models.database import db, Note, User
+from models.database import db, Note, User, Category, utc_now
+from models import hashing, search
+
+# Vocabulary for synthetic notes (also used as search terms by the benchmarks)
+SYNTHETIC_WORDS = (
+    'meeting', 'project', 'idea', 'shopping', 'travel', 'budget', 'recipe', 'book', 'deadline', 'review',
+    'garden', 'invoice', 'workout', 'birthday', 'release', 'server', 'database', 'design', 'holiday', 'call',
+    'report', 'draft', 'plan', 'list', 'summary', 'question', 'answer', 'lecture', 'exam', 'doctor',
+    'car', 'insurance', 'apartment', 'movie', 'music', 'podcast', 'conference', 'customer', 'feedback', 'bug',
+)
+SYNTHETIC_COLORS = ('#007bff', '#28a745', '#dc3545', '#ffc107', '#17a2b8', '#6f42c1', '#fd7e14', '#20c997')
+SYNTHETIC_BATCH_SIZE = 10000
+SYNTHETIC_PARAGRAPH_WORDS = 60
+SYNTHETIC_MAX_WORDS = 3000
 
 @click.command()
 @with_appcontext
@@ -54,6 +71,96 @@ def seed_db():
     db.session.commit()
     click.echo(f'Added {len(sample_notes)} sample notes for test user.')
 
+def synthetic_text(rng, words):
+    """Return sentence-like text of random vocabulary words, split into paragraphs when long."""
+    chosen = rng.choices(SYNTHETIC_WORDS, k=words)
+    paragraphs = [' '.join(chosen[i:i + SYNTHETIC_PARAGRAPH_WORDS]).capitalize() for i in range(0, words, SYNTHETIC_PARAGRAPH_WORDS)]
+    return '\n\n'.join(paragraphs)
+
+def synthetic_content_words(rng):
+    """Draw a note length in words: mostly short notes with a long tail (log-normal, median ~33 words)."""
+    return max(1, min(SYNTHETIC_MAX_WORDS, int(rng.lognormvariate(3.5, 1.0))))
+
+def generate_synthetic_data(users, notes_per_user, categories, seed=0, password='benchmark', batch_size=SYNTHETIC_BATCH_SIZE, progress=None):
+    """Insert users x notes x categories of deterministic synthetic data with Core executemany INSERTs.
+
+    Users are named synthetic_<seed>_<n> and share one password. Notes are committed in
+    batches of batch_size rows; progress, if given, is called with the number of notes
+    inserted by each batch. Returns the usernames.
+    """
+    rng = random.Random(seed)
+    password_hash = hashing.hash_password(password)  # Hashing is slow, so all users share one hash
+    prefix = f'synthetic_{seed}_'
+    usernames = [f'{prefix}{n}' for n in range(users)]
+    is_synthetic = User.username.startswith(prefix, autoescape=True)
+
+    for i in range(0, users, batch_size):
+        db.session.execute(User.__table__.insert(), [{'username': username, 'password_hash': password_hash} for username in usernames[i:i + batch_size]])
+    user_ids = db.session.scalars(db.select(User.id).where(is_synthetic).order_by(User.id)).all()
+
+    category_rows = [
+        {'name': f'Category {n + 1}', 'color': SYNTHETIC_COLORS[n % len(SYNTHETIC_COLORS)], 'user_id': user_id}
+        for user_id in user_ids for n in range(categories)
+    ]
+    for i in range(0, len(category_rows), batch_size):
+        db.session.execute(Category.__table__.insert(), category_rows[i:i + batch_size])
+    category_ids = {}
+    for category_id, user_id in db.session.execute(db.select(Category.id, Category.user_id).join(User).where(is_synthetic)):
+        category_ids.setdefault(user_id, []).append(category_id)
+    db.session.commit()
+
+    now = utc_now()
+    rows = []
+    for user_id in user_ids:
+        choices = category_ids.get(user_id, [])
+        for _ in range(notes_per_user):
+            created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            # A third of the notes were edited after creation
+            updated_at = created_at + timedelta(seconds=rng.randint(0, int((now - created_at).total_seconds()))) if rng.random() < 0.3 else created_at
+            rows.append({
+                'title': synthetic_text(rng, rng.randint(1, 8)),
+                'content': synthetic_text(rng, synthetic_content_words(rng)),
+                'user_id': user_id,
+                'category_id': rng.choice(choices) if choices and rng.random() < 0.8 else None,
+                'archived': rng.random() < 0.1,
+                'created_at': created_at,
+                'updated_at': updated_at,
+            })
+            if len(rows) >= batch_size:
+                insert_note_batch(rows, progress)
+                rows = []
+    if rows:
+        insert_note_batch(rows, progress)
+    return usernames
+
+def insert_note_batch(rows, progress=None):
+    """Insert and commit one batch of note rows."""
+    db.session.execute(Note.__table__.insert(), rows)
+    db.session.commit()
+    if progress is not None:
+        progress(len(rows))
+
+@click.command()
+@click.option('--users', default=10, show_default=True, help='Number of users to create')
+@click.option('--notes-per-user', default=1000, show_default=True, help='Notes per user')
+@click.option('--categories', default=5, show_default=True, help='Categories per user')
+@click.option('--seed', default=0, show_default=True, help='Random seed (the same seed generates the same data)')
+@click.option('--batch-size', default=SYNTHETIC_BATCH_SIZE, show_default=True, help='Rows per INSERT batch and transaction')
+@with_appcontext
+def seed_bulk(users, notes_per_user, categories, seed, batch_size):
+    """Bulk insert a synthetic dataset for load testing and capacity planning."""
+    if User.query.filter(User.username.startswith(f'synthetic_{seed}_', autoescape=True)).first():
+        click.echo(f'Synthetic users for seed {seed} already exist. Skipping seed (use another --seed).')
+        return
+
+    start = time.perf_counter()
+    total = users * notes_per_user
+    with click.progressbar(length=total, label=f'Inserting {total} notes for {users} users') as bar:
+        generate_synthetic_data(users, notes_per_user, categories, seed=seed, batch_size=batch_size, progress=bar.update)
+    elapsed = time.perf_counter() - start
+    click.echo(f'Created {users} users, {users * categories} categories and {total} notes in {elapsed:.1f}s '
+               f'({total / elapsed if elapsed else 0:.0f} notes/s). Users are named synthetic_{seed}_<n> (password: benchmark).')
+
 @click.command()
 @with_appcontext
 def reset_db():
@@ -78,11 +185,23 @@ def create_user(username, password):
     db.session.commit()
     click.echo(f'Created user: {username}')
 
+@click.command()
+@with_appcontext
+def rebuild_search_index():
+    """Create the full-text search index and backfill it from existing notes."""
+    backend = search.rebuild_index()
+    if backend is None:
+        click.echo(f'Full-text search is not supported on {db.engine.dialect.name}. Using LIKE fallback.')
+        return
+    click.echo(f'Rebuilt full-text search index ({backend}) for {Note.query.count()} notes.')
+
 # Register commands with the app
 def init_app(app):
     """Register database CLI commands with Flask app."""
     app.cli.add_command(init_db)
     app.cli.add_command(seed_db)
+    app.cli.add_command(seed_bulk)
     app.cli.add_command(reset_db)
     app.cli.add_command(create_user)
+    app.cli.add_command(rebuild_search_index)
 
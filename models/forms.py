@@ -6,6 +6,7 @@ from wtforms import StringField, PasswordField, TextAreaField, SubmitField, Sele
 from wtforms.validators import DataRequired, Length, ValidationError, EqualTo, Optional
 from flask_babel import lazy_gettext as translate_lazy
 from models.database import User, Category
+from models.cache import get_categories
 from flask_login import current_user
 
 class LoginForm(FlaskForm):
@@ -86,5 +87,5 @@ class NoteForm(FlaskForm):
         super(NoteForm, self).__init__(*args, **kwargs)
         if current_user.is_authenticated:
             # Populate category choices for current user
-            self.category_id.choices = [(0, translate_lazy('No Category'))] + [(cat.id, cat.name) for cat in Category.query.filter_by(user_id=current_user.id).order_by(Category.name).all()]
+            self.category_id.choices = [(0, translate_lazy('No Category'))] + [(cat.id, cat.name) for cat in get_categories(current_user.id)]
 
@@ -0,0 +1,111 @@
+"""
+Password hashing service for Flask Notes app.
+Hashes and verifies passwords in a process pool with a bounded queue, so slow key
+derivation does not hold request threads, and detects hashes with outdated parameters.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from flask import current_app, has_app_context, render_template
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full or a job takes too long."""
+
+class PasswordHasher:
+    """Hashes passwords inline (workers=0) or in a process pool with at most workers + queue_size jobs."""
+
+    def __init__(self, method='scrypt', salt_length=16, workers=0, queue_size=16, timeout=10):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size) if workers > 0 else None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._prefix = None
+
+    def _pool(self):
+        # A forked worker process must not reuse its parent's pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, func, *args):
+        if self._slots is None:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._pool().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is freed when the job finishes, even if the request stopped waiting
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingBusy() from None
+
+    def hash(self, password):
+        """Return a hash of the password with the configured method."""
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        """Check a password against a stored hash."""
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Check whether a stored hash was created with other parameters than configured."""
+        if self._prefix is None:
+            # Werkzeug expands defaults (e.g. 'scrypt' -> 'scrypt:32768:8:1'), so hash once to learn the prefix
+            self._prefix = generate_password_hash('', self.method, 1).split('$', 1)[0]
+        method, _, rest = pwhash.partition('$')
+        return method != self._prefix or len(rest.partition('$')[0]) != self.salt_length
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+_inline_hasher = PasswordHasher()
+
+def get_hasher():
+    """Return the app's hasher, or an inline one with werkzeug defaults outside an app context."""
+    if has_app_context():
+        return current_app.extensions.get('password_hasher', _inline_hasher)
+    return _inline_hasher
+
+def hash_password(password):
+    """Hash a password with the configured hasher."""
+    return get_hasher().hash(password)
+
+def check_password(pwhash, password):
+    """Check a password against a stored hash with the configured hasher."""
+    return get_hasher().verify(pwhash, password)
+
+def needs_rehash(pwhash):
+    """Check whether a stored hash should be upgraded to the configured parameters."""
+    return get_hasher().needs_rehash(pwhash)
+
+def busy_handler(e):
+    """Ask the client to retry instead of queueing more hashing work."""
+    return render_template('errors/busy.html'), 503, {'Retry-After': str(current_app.config['PASSWORD_HASH_RETRY_AFTER'])}
+
+def init_app(app):
+    """Create the app's password hasher and register the 503 handler for a full queue."""
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_HASH_SALT_LENGTH'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_size=app.config['PASSWORD_HASH_QUEUE_SIZE'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+    )
+    app.register_error_handler(HashingBusy, busy_handler)
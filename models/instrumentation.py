@@ -0,0 +1,196 @@
+"""
+Per-request instrumentation for Flask Notes app.
+Records wall time, SQL statements (via SQLAlchemy engine events), Jinja render time
+and locale resolution, and reports them as Server-Timing headers and structured
+log lines. Slow requests can be profiled with cProfile or pyinstrument.
+"""
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import pyinstrument
+except ImportError:  # Optional dependency, cProfile is used without it
+    pyinstrument = None
+
+logger = logging.getLogger('flask_notes.instrumentation')
+
+# Profilers can't overlap (Python 3.12+ raises ValueError), so concurrent requests are profiled one at a time
+_profile_lock = threading.Lock()
+
+class RequestTiming:
+    """Timings collected while handling one request."""
+
+    __slots__ = ('start', 'db_count', 'db_time', 'slow_queries', 'template_time', 'template_start', 'locale_time', 'profiler')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.slow_queries = []  # (duration, statement), slowest first
+        self.template_time = 0.0
+        self.template_start = None
+        self.locale_time = 0.0
+        self.profiler = None
+
+    def record_query(self, statement, duration, keep):
+        """Add a statement, keeping the slowest ones."""
+        self.db_count += 1
+        self.db_time += duration
+        self.slow_queries.append((duration, statement))
+        self.slow_queries.sort(key=lambda item: item[0], reverse=True)
+        del self.slow_queries[keep:]
+
+def current_timing():
+    """Return the timing of the current request, or None when instrumentation is off."""
+    return g.get('_request_timing') if has_request_context() else None
+
+def timed_locale(func):
+    """Wrap the locale selector to measure locale resolution time."""
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        timing = current_timing()
+        if timing is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timing.locale_time += time.perf_counter() - start
+    return wrapped
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timing() is not None:
+        conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = current_timing()
+    starts = conn.info.get('_query_start')
+    if timing is not None and starts:
+        timing.record_query(statement, time.perf_counter() - starts.pop(), current_app.config['INSTRUMENTATION_SLOW_QUERIES'])
+
+def on_before_render(sender, template, context, **extra):
+    timing = current_timing()
+    if timing is not None:
+        timing.template_start = time.perf_counter()
+
+def on_rendered(sender, template, context, **extra):
+    timing = current_timing()
+    if timing is not None and timing.template_start is not None:
+        timing.template_time += time.perf_counter() - timing.template_start
+        timing.template_start = None
+
+def server_timing_header(timing, total):
+    """Format timings as a Server-Timing header value (durations in milliseconds)."""
+    return ', '.join([
+        f'app;dur={total * 1000:.1f}',
+        f'db;dur={timing.db_time * 1000:.1f};desc="{timing.db_count} queries"',
+        f'tpl;dur={timing.template_time * 1000:.1f}',
+        f'locale;dur={timing.locale_time * 1000:.2f}',
+    ])
+
+def start_profiler(app):
+    """Start a pyinstrument profiler if selected and installed, otherwise cProfile."""
+    if app.config['INSTRUMENTATION_PROFILER'] == 'pyinstrument' and pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+def stop_profiler(profiler):
+    """Stop a profiler started by start_timing and let the next request be profiled."""
+    try:
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+        else:
+            profiler.stop()
+    finally:
+        _profile_lock.release()
+
+def dump_profile(app, profiler, total):
+    """Write the profile of a slow request to INSTRUMENTATION_PROFILE_DIR and return its path."""
+    directory = app.config['INSTRUMENTATION_PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unknown'}-{total * 1000:.0f}ms"
+    if isinstance(profiler, cProfile.Profile):
+        path = os.path.join(directory, f'{name}.prof')
+        profiler.dump_stats(path)
+    else:
+        path = os.path.join(directory, f'{name}.html')
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+    return path
+
+_engine_events_registered = False
+
+def init_app(app):
+    """Register instrumentation hooks when INSTRUMENTATION_ENABLED is set."""
+    global _engine_events_registered
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+
+    if not _engine_events_registered:
+        event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+        _engine_events_registered = True
+    before_render_template.connect(on_before_render, app)
+    template_rendered.connect(on_rendered, app)
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def start_timing():
+        timing = g._request_timing = RequestTiming()
+        # Every request is profiled unless another one is, but only slow ones are written to disk
+        if app.config['INSTRUMENTATION_PROFILE_DIR'] and _profile_lock.acquire(blocking=False):
+            try:
+                timing.profiler = start_profiler(app)
+            except ValueError:  # A profiler not started here (e.g. a debugger) is active
+                _profile_lock.release()
+
+    @app.after_request
+    def report_timing(response):
+        timing = g.pop('_request_timing', None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.start
+        if timing.profiler is not None:
+            stop_profiler(timing.profiler)
+        response.headers['Server-Timing'] = server_timing_header(timing, total)
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 2),
+            'db_queries': timing.db_count,
+            'db_ms': round(timing.db_time * 1000, 2),
+            'template_ms': round(timing.template_time * 1000, 2),
+            'locale_ms': round(timing.locale_time * 1000, 3),
+            'slowest_queries': [{'ms': round(duration * 1000, 2), 'sql': statement[:200]} for duration, statement in timing.slow_queries],
+        }
+
+        if timing.profiler is not None and total * 1000 >= app.config['INSTRUMENTATION_PROFILE_THRESHOLD_MS']:
+            record['profile'] = dump_profile(app, timing.profiler, total)
+
+        logger.info(json.dumps(record))
+        return response
+
+    @app.teardown_request
+    def discard_timing(exc):
+        # Requests that failed before after_request still have a running profiler
+        timing = g.pop('_request_timing', None)
+        if timing is not None and timing.profiler is not None:
+            stop_profiler(timing.profiler)
@@ -1,41 +1,44 @@
 """
 Rate limiter configuration for Flask Notes app.
 """
+import math
 import os
 import time
 
-from flask import render_template, session
+from flask import render_template
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from models import limiter_storage  # noqa: F401 (registers the sqlite:// storage scheme)
 
-# Smart key function: bypass rate limit after 60s session time
-def smart_key():
-    key = f"rl_{get_remote_address()}"
-    if key in session and time.time() - session[key] >= 60:
-        session.pop(key, None)
-        return f"cleared_{get_remote_address()}_{int(time.time())}"
-    return get_remote_address()
+# Seconds a throttled client waits if the breached limit's reset time is unknown
+COOLDOWN_SECONDS = 60
 
-# Create limiter instance
+# Create limiter instance (one set of limit keys per client address)
 limiter = Limiter(
     enabled=os.getenv('FLASK_LIMITER_ENABLED', 'False'),
     storage_uri=os.getenv('FLASK_LIMITER_STORAGE_URI', 'memory://'),
     default_limits=[os.getenv('FLASK_LIMITER_DEFAULT_LIMIT', '50 per minute')],
-    strategy="moving-window",
-    key_func=smart_key
+    strategy=os.getenv('FLASK_LIMITER_STRATEGY', 'moving-window'),
+    key_func=get_remote_address
 )
 
-# Rate limit handler
-def rate_limit_handler(e):
-    key = f"rl_{get_remote_address()}"
-    now = time.time()
-
-    if key not in session:
-        session[key] = now
-        retry_after = 60
-    else:
-        retry_after = max(1, int(60 - (now - session[key])))
+def start_cooldown():
+    """Return the seconds until the client may retry, starting its cooldown on the first rejection.
 
-    reset_time = time.strftime('%H:%M:%S', time.localtime(now + retry_after))
-    return render_template('errors/rate_limit.html', retry_after=retry_after, limit_description=getattr(e, 'description', 'Rate limit exceeded'), reset_time=reset_time), 429
+    The cooldown is a counter in the limiter storage that expires when the breached limit
+    resets, so the countdown survives page refreshes and needs no session state.
+    """
+    storage = limiter.storage
+    key = f"cooldown/{get_remote_address()}"
+    now = time.time()
+    if not storage.get(key):
+        current = limiter.current_limit
+        reset_at = current.reset_at if current is not None else now + COOLDOWN_SECONDS
+        storage.incr(key, max(1, int(reset_at - now)))
+    return max(1, math.ceil(storage.get_expiry(key) - now))
 
+# Rate limit handler
+def rate_limit_handler(e):
+    retry_after = start_cooldown()
+    reset_time = time.strftime('%H:%M:%S', time.localtime(time.time() + retry_after))
+    return render_template('errors/rate_limit.html', retry_after=retry_after, limit_description=getattr(e, 'description', 'Rate limit exceeded'), reset_time=reset_time), 429, {'Retry-After': str(retry_after)}
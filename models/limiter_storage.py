@@ -0,0 +1,176 @@
+"""
+Shared rate limit storage for Flask Notes app.
+Registers an SQLite-backed storage for the limits library under the sqlite:// scheme, so all
+worker processes on one host count against the same limits (a local stand-in for Redis).
+
+    FLASK_LIMITER_STORAGE_URI=sqlite:///instance/rate_limits.db    (relative path)
+    FLASK_LIMITER_STORAGE_URI=sqlite:////var/lib/flask-notes/rate_limits.db
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from math import floor
+
+from limits.storage import MovingWindowSupport, SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+# Seconds between sweeps of expired counters and window entries
+PURGE_INTERVAL = 60
+
+class SQLiteStorage(Storage, MovingWindowSupport, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Rate limit storage in an SQLite file, supporting all limiter strategies."""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, timeout=5, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        # sqlite:///relative.db or sqlite:////absolute.db, as for SQLAlchemy URLs
+        path = uri.split('://', 1)[1]
+        self.path = path[1:] if path.startswith('/') else path
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        self._next_purge = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires REAL NOT NULL) WITHOUT ROWID")
+        conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT NOT NULL, at REAL NOT NULL, expires REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_key_at ON entries (key, at)")
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements atomically across processes (takes the write lock up front)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._purge_expired(conn)
+
+    def _purge_expired(self, conn):
+        """Drop expired counters and window entries every PURGE_INTERVAL seconds."""
+        now = time.time()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + PURGE_INTERVAL
+        conn.execute("DELETE FROM counters WHERE expires <= ?", (now,))
+        conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+
+    def _incr(self, conn, key, expiry, amount, now):
+        conn.execute(
+            "INSERT INTO counters (key, value, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "value = CASE WHEN expires <= ? THEN excluded.value ELSE value + excluded.value END, "
+            "expires = CASE WHEN expires <= ? THEN excluded.expires ELSE expires END",
+            (key, amount, now + expiry, now, now))
+        return self._get(conn, key, now)
+
+    def _get(self, conn, key, now):
+        row = conn.execute("SELECT value FROM counters WHERE key = ? AND expires > ?", (key, now)).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, key, expiry, amount=1):
+        with self._transaction() as conn:
+            return self._incr(conn, key, expiry, amount, time.time())
+
+    def decr(self, key, amount=1):
+        with self._transaction() as conn:
+            conn.execute("UPDATE counters SET value = max(value - ?, 0) WHERE key = ?", (amount, key))
+            return self._get(conn, key, time.time())
+
+    def get(self, key):
+        return self._get(self._connect(), key, time.time())
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connect().execute("SELECT expires FROM counters WHERE key = ? AND expires > ?", (key, now)).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._connect().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self._transaction() as conn:
+            count = conn.execute("SELECT (SELECT COUNT(*) FROM counters) + (SELECT COUNT(DISTINCT key) FROM entries)").fetchone()[0]
+            conn.execute("DELETE FROM counters")
+            conn.execute("DELETE FROM entries")
+        return count
+
+    def clear(self, key):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    # Moving window: one row per hit within the window
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ? AND at < ?", (key, now - expiry))
+            # The window is full if the (limit - amount + 1)th newest hit is still inside it
+            row = conn.execute("SELECT at FROM entries WHERE key = ? ORDER BY at DESC LIMIT 1 OFFSET ?", (key, limit - amount)).fetchone()
+            if row is not None:
+                return False
+            conn.executemany("INSERT INTO entries (key, at, expires) VALUES (?, ?, ?)", [(key, now, now + expiry)] * amount)
+            return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        oldest, count = self._connect().execute("SELECT MIN(at), COUNT(*) FROM entries WHERE key = ? AND at >= ?", (key, now - expiry)).fetchone()
+        return (oldest, count) if count else (now, 0)
+
+    # Sliding window counter: two fixed-window counters, the previous one weighted by its overlap
+
+    def _sliding_window(self, conn, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            # The current window's counter is still needed as the previous window of the next one
+            self._incr(conn, self.sliding_window_keys(key, expiry, now)[1], 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        return self._sliding_window(self._connect(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
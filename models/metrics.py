@@ -0,0 +1,299 @@
+"""
+Prometheus-style metrics for Flask Notes app.
+A small in-process registry of counters and histograms. With METRICS_DIR set, every
+worker process periodically writes its values to its own file in that directory and
+/metrics sums the files of all workers, like prometheus_client's multiprocess mode.
+Files of exited workers are folded into one archive file, so totals never go down.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models.database import db
+from models.limiter import limiter
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where files of exited workers are kept
+    fcntl = None
+
+# Upper bounds in seconds (the +Inf bucket is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'flask_notes_requests_total': ('counter', 'HTTP requests by endpoint, method and status.', None),
+    'flask_notes_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint.', LATENCY_BUCKETS),
+    'flask_notes_db_pool_checkouts_total': ('counter', 'Connections checked out of the database pool.', None),
+    'flask_notes_db_pool_wait_seconds': ('histogram', 'Time spent getting a connection from the pool (including new connections).', POOL_WAIT_BUCKETS),
+    'flask_notes_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit or miss).', None),
+    'flask_notes_rate_limited_total': ('counter', 'Requests rejected by the rate limiter by endpoint.', None),
+}
+
+# Values of exited worker processes, merged into one file
+ARCHIVE_FILE = 'metrics_archive.json'
+LOCK_FILE = 'metrics.lock'
+
+def process_alive(pid):
+    """Check whether a process with this PID is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Running under another user
+    return True
+
+def merge_snapshots(snapshots):
+    """Sum counters and histogram buckets of several snapshots by metric name and labels."""
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(sorted(labels.items())))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, data in snapshot['histograms']:
+            key = (name, tuple(sorted(labels.items())))
+            merged = histograms.get(key)
+            histograms[key] = data if merged is None else [a + b for a, b in zip(merged, data)]
+    return counters, histograms
+
+def write_json(path, data):
+    """Write JSON atomically, so readers never see a partial file."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+class Registry:
+    """Thread-safe counters and histograms keyed by metric name and label values."""
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def inc(self, name, amount=1, **labels):
+        """Increase a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record a value in a histogram."""
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            data = self._histograms.get(key)
+            if data is None:
+                data = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            # Counts are stored per bucket and made cumulative when rendering
+            data[bisect_left(buckets, value)] += 1
+            data[-1] += value
+
+    def snapshot(self):
+        """Return this process's values in a JSON-serializable form."""
+        with self._lock:
+            return {
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, dict(labels), list(data)] for (name, labels), data in self._histograms.items()],
+            }
+
+    def flush(self, force=False):
+        """Write this process's values to METRICS_DIR, at most every flush_interval seconds."""
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        write_json(self._path(os.getpid()), self.snapshot())
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'metrics_{pid}.json')
+
+    @contextmanager
+    def _locked(self, exclusive):
+        """Hold the directory lock (shared for reading, exclusive for archiving)."""
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield  # Closing the file releases the lock
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.directory, name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_all(self):
+        snapshots = [self._read(name) for name in os.listdir(self.directory)
+                     if name.startswith('metrics_') and name.endswith('.json')]
+        return [snapshot for snapshot in snapshots if snapshot is not None]
+
+    def worker_pids(self):
+        """Return the PIDs of all worker files in METRICS_DIR."""
+        names = (name[len('metrics_'):-len('.json')] for name in os.listdir(self.directory)
+                 if name.startswith('metrics_') and name.endswith('.json'))
+        return [int(name) for name in names if name.isdigit()]
+
+    def archive(self, pids):
+        """Fold the files of the given worker processes into the archive file and remove them."""
+        if not self.directory or fcntl is None:
+            return
+        with self._locked(exclusive=True):
+            # Another process may have archived some of them already
+            paths = [path for path in map(self._path, pids) if os.path.exists(path)]
+            if not paths:
+                return
+            snapshots = [self._read(os.path.basename(path)) for path in paths]
+            archive = self._read(ARCHIVE_FILE)
+            counters, histograms = merge_snapshots([s for s in [archive, *snapshots] if s is not None])
+            write_json(os.path.join(self.directory, ARCHIVE_FILE), {
+                'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+                'histograms': [[name, dict(labels), data] for (name, labels), data in histograms.items()],
+            })
+            for path in paths:
+                os.remove(path)
+
+    def retire(self):
+        """Archive this process's values when it exits."""
+        if self.directory:
+            self.flush(force=True)
+            self.archive([os.getpid()])
+
+    def collect(self):
+        """Merge the values of all worker processes (or only this one without METRICS_DIR)."""
+        if not self.directory:
+            return merge_snapshots([self.snapshot()])
+        self.flush(force=True)
+        if fcntl is None:
+            return merge_snapshots(self._read_all())
+        # Workers that died without archiving their values (e.g. killed)
+        self.archive([pid for pid in self.worker_pids() if not process_alive(pid)])
+        with self._locked(exclusive=False):
+            return merge_snapshots(self._read_all())
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{format_labels(labels)} {value}')
+                continue
+            for (metric, labels), data in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), data):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{format_labels(labels + (("le", str(bound)),))} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {data[-1]}')
+                lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+def escape_label(value):
+    """Escape a label value for the text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    """Format label pairs as {a="1",b="2"}."""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in labels) + '}'
+
+def get_registry():
+    """Return the app's registry, or None when metrics are disabled."""
+    return current_app.extensions.get('metrics')
+
+def inc(name, amount=1, **labels):
+    """Increase a counter of the current app (no-op when metrics are disabled)."""
+    registry = get_registry()
+    if registry is not None:
+        registry.inc(name, amount, **labels)
+
+class TimedPoolMixin:
+    """Connection pool mixin recording how long connect() takes in the registry assigned to the pool."""
+
+    registry = None
+
+    def connect(self):
+        # Pool events only fire after a connection was obtained, so the public getter is timed
+        if self.registry is None:
+            return super().connect()
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.registry.observe('flask_notes_db_pool_wait_seconds', time.perf_counter() - start)
+
+    def recreate(self):
+        # Engine.dispose() replaces the pool with a recreated one of the same class
+        pool = super().recreate()
+        pool.registry = self.registry
+        return pool
+
+def timed_pool_class(uri):
+    """Return the default pool class of a database URI with TimedPoolMixin (for the poolclass engine option)."""
+    url = make_url(uri)
+    base = url.get_dialect().get_pool_class(url)
+    return type(f'Timed{base.__name__}', (TimedPoolMixin, base), {})
+
+def instrument_engine(engine, registry):
+    """Count pool checkouts and, if the engine uses a timed pool class, time pool waits."""
+    if isinstance(engine.pool, TimedPoolMixin):
+        engine.pool.registry = registry
+    event.listen(engine.pool, 'checkout', lambda *args: registry.inc('flask_notes_db_pool_checkouts_total'))
+
+def init_app(app):
+    """Set up the metrics registry, request and database hooks and the /metrics endpoint."""
+    if not app.config['METRICS_ENABLED']:
+        app.extensions['metrics'] = None
+        return
+    registry = Registry(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+    app.extensions['metrics'] = registry
+    atexit.register(registry.retire)
+
+    with app.app_context():
+        for engine in [*db.engines.values(), *app.extensions.get('replica_engines', [])]:
+            instrument_engine(engine, registry)
+
+    @app.before_request
+    def start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('_metrics_start', None)
+        endpoint = request.endpoint or 'none'
+        if start is not None:
+            registry.observe('flask_notes_request_duration_seconds', time.perf_counter() - start, endpoint=endpoint)
+        registry.inc('flask_notes_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+        if response.status_code == 429:
+            # Only the rate limiter answers with 429 (rendered by models.limiter.rate_limit_handler)
+            registry.inc('flask_notes_rate_limited_total', endpoint=endpoint)
+        registry.flush()
+        return response
+
+    @app.route('/metrics')
+    @limiter.exempt
+    def metrics():
+        """Expose metrics in the Prometheus text format."""
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,116 @@
+"""
+Keyset (cursor) pagination for Flask Notes app.
+Pages are addressed by opaque cursors encoding the sort key of the first/last row,
+so deep pages cost the same as the first one and no OFFSET is needed.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import and_, or_
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded."""
+
+def encode_cursor(values, direction):
+    """Encode sort key values and a direction ('next' or 'prev') into an opaque URL-safe token."""
+    payload = {'d': direction, 'v': [value.isoformat() if isinstance(value, datetime) else value for value in values]}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token, columns):
+    """Decode a cursor token into (values, direction), converting values to the column types."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        values, direction = payload['v'], payload['d']
+        if direction not in ('next', 'prev') or len(values) != len(columns):
+            raise InvalidCursor(token)
+        return [_from_json(value, column) for value, column in zip(values, columns)], direction
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(token) from e
+
+def _from_json(value, column):
+    """Convert a JSON cursor value back to the Python type of its column."""
+    if value is not None and column.type.python_type is datetime:
+        return datetime.fromisoformat(value)
+    return value
+
+def _after(columns, values, descending):
+    """Build the WHERE clause selecting rows strictly after the given sort key."""
+    clauses = []
+    for i, column in enumerate(columns):
+        comparison = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*[columns[j] == values[j] for j in range(i)], comparison))
+    return or_(*clauses)
+
+class KeysetPagination:
+    """One page of keyset-paginated results.
+
+    Exposes ``items``, ``next_cursor``/``prev_cursor`` (None at the ends) and
+    ``total`` (None when counting is skipped).
+    """
+
+    # Page-number attributes, so templates can fall back to the numbered UI
+    page = None
+    pages = 0
+
+    def __init__(self, query, columns, per_page, cursor=None, descending=False, count=True):
+        self.per_page = per_page
+        self.columns = columns
+        values, direction = decode_cursor(cursor, columns) if cursor else (None, 'next')
+        backwards = direction == 'prev'
+
+        # Walk backwards by flipping the sort order, then restore it
+        reverse = descending != backwards
+        ordered = query.order_by(*[column.desc() if reverse else column.asc() for column in columns])
+        if values is not None:
+            ordered = ordered.filter(_after(columns, values, reverse))
+        rows = ordered.limit(per_page + 1).all()
+
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+        self.items = rows
+
+        # There is always a page on the side we came from
+        has_next = has_more if not backwards else values is not None
+        has_prev = has_more if backwards else values is not None
+        self.next_cursor = self._cursor(rows[-1], 'next') if rows and has_next else None
+        self.prev_cursor = self._cursor(rows[0], 'prev') if rows and has_prev else None
+        self.total = query.order_by(None).count() if count else None
+
+    def _cursor(self, row, direction):
+        """Build the cursor pointing past the given row."""
+        return encode_cursor([getattr(row, column.key) for column in self.columns], direction)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+def paginate(query, columns, per_page, descending=False, allow_keyset=True):
+    """Paginate a query by cursor or page number, depending on the request and app config.
+
+    Keyset mode is used when the request carries a ``cursor`` or ``PAGINATION_MODE`` is
+    'keyset'; otherwise (or when ``allow_keyset`` is False) the ``page`` argument is used.
+    """
+    cursor = request.args.get('cursor')
+    if allow_keyset and (cursor or current_app.config['PAGINATION_MODE'] == 'keyset'):
+        count = current_app.config['PAGINATION_COUNT']
+        try:
+            return KeysetPagination(query, columns, per_page, cursor=cursor, descending=descending, count=count)
+        except InvalidCursor:
+            return KeysetPagination(query, columns, per_page, descending=descending, count=count)
+
+    page = request.args.get('page', 1, type=int)
+    ordered = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    pagination = ordered.paginate(page=page, per_page=per_page, error_out=False)
+    pagination.next_cursor = pagination.prev_cursor = None
+    return pagination
@@ -0,0 +1,72 @@
+"""
+Read replica routing for Flask Notes app.
+SELECTs issued while handling GET/HEAD requests go to a replica database. Writes, and
+reads after a write in the same request or within REPLICA_PIN_SECONDS of the client's
+last write request, go to the primary so users always read their own changes.
+"""
+import os
+import random
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_SESSION_KEY = '_primary_until'
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica chosen for the current request."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                # The rest of the request must see this write
+                self.info['wrote'] = True
+            elif getattr(clause, 'is_select', False) and not self.info.get('wrote'):
+                replica = g.get('_replica')
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def create_replica_engine(app, uri):
+    """Create an engine for a replica with the same options as the primary."""
+    url = make_url(uri)
+    # Relative SQLite paths are relative to the instance folder, as for SQLALCHEMY_DATABASE_URI
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:' and not os.path.isabs(url.database):
+        url = url.set(database=os.path.join(app.instance_path, url.database))
+    return create_engine(url, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+
+def init_app(app):
+    """Create replica engines, route reads of safe requests to them and pin clients to the primary after writes."""
+    # Kept out of SQLALCHEMY_BINDS, since Flask-SQLAlchemy registers metadata for every bind key
+    engines = [create_replica_engine(app, uri) for uri in app.config['SQLALCHEMY_REPLICA_URIS']]
+    app.extensions['replica_engines'] = engines
+    if not engines:
+        return
+    db = app.extensions['sqlalchemy']
+
+    @app.before_request
+    def choose_replica():
+        if request.method not in SAFE_METHODS:
+            return
+        pinned_until = session.get(PIN_SESSION_KEY)
+        if pinned_until is not None and pinned_until > time.time():
+            return
+        if pinned_until is not None:
+            session.pop(PIN_SESSION_KEY)
+        g._replica = random.choice(engines)
+
+    @app.after_request
+    def pin_after_write(response):
+        if request.method not in SAFE_METHODS:
+            session[PIN_SESSION_KEY] = time.time() + current_app.config['REPLICA_PIN_SECONDS']
+        return response
+
+    @app.teardown_request
+    def reset_routing(exc):
+        g.pop('_replica', None)
+        if db.session.registry.has():
+            db.session.info.pop('wrote', None)
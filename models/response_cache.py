@@ -0,0 +1,189 @@
+"""
+Server-side response cache for rendered pages in Flask Notes app.
+Pages are cached per user, URL and locale. Every write request by a user bumps a
+per-user version counter, which is part of the cache key. The counters live in an SQLite
+file shared by all worker processes on one host, so no worker serves a page older than
+the user's last write.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request, session, make_response
+from flask_babel import get_locale
+from flask_login import current_user
+from models.cache import LRUCache
+from models import metrics
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+class SQLiteVersions:
+    """Per-user version counters in an SQLite file shared by all worker processes on one host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute("CREATE TABLE IF NOT EXISTS versions (user_id INTEGER PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_version(self, user_id):
+        row = self._connect().execute("SELECT version FROM versions WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, user_id):
+        self._connect().execute(
+            "INSERT INTO versions (user_id, version) VALUES (?, 1) "
+            "ON CONFLICT(user_id) DO UPDATE SET version = version + 1", (user_id,))
+
+class MemoryBackend:
+    """In-process LRU of pages (per worker) with versions shared through an SQLite file.
+
+    A write handled by one worker bumps the version every worker reads, so no worker
+    serves a page rendered before it.
+    """
+
+    def __init__(self, versions, maxsize=512, ttl=300):
+        self._cache = LRUCache(maxsize, ttl)
+        self._versions = versions
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def get_version(self, user_id):
+        return self._versions.get_version(user_id)
+
+    def bump_version(self, user_id):
+        self._versions.bump_version(user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+class SQLiteBackend(SQLiteVersions):
+    """SQLite file backend for pages and versions, shared by all worker processes on one host.
+
+    Local stand-in for a shared key-value store such as Redis.
+    """
+
+    # Seconds between deletions of expired pages
+    PURGE_INTERVAL = 60
+
+    def __init__(self, path, ttl=300):
+        super().__init__(path)
+        self.ttl = ttl
+        self._next_purge = 0.0
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_expires ON pages (expires)")
+
+    def get(self, key):
+        row = self._connect().execute("SELECT value FROM pages WHERE key = ? AND expires > ?", (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO pages (key, value, expires) VALUES (?, ?, ?)", (key, value, now + self.ttl))
+        if now >= self._next_purge:
+            self._next_purge = now + self.PURGE_INTERVAL
+            self.purge(now)
+
+    def purge(self, now=None):
+        """Delete expired pages and return how many were removed."""
+        return self._connect().execute("DELETE FROM pages WHERE expires <= ?", (time.time() if now is None else now,)).rowcount
+
+    def clear(self):
+        self._connect().execute("DELETE FROM pages")
+
+class ResponseCache:
+    """Page cache with hit/miss metrics on top of a storage backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, user_id):
+        """Build the cache key for the current request and user."""
+        # The session's CSRF secret is part of the key, since cached forms embed tokens derived from it
+        variant = f"{request.full_path}|{get_locale()}|{session.get('csrf_token', '')}"
+        digest = hashlib.sha256(variant.encode()).hexdigest()
+        return f"page:{request.endpoint}:{user_id}:{self.backend.get_version(user_id)}:{digest}"
+
+    def invalidate_user(self, user_id):
+        """Make all cached pages of a user stale."""
+        self.backend.bump_version(user_id)
+
+    def stats(self):
+        """Return hit/miss counters."""
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_ratio': self.hits / total if total else 0.0}
+
+def create_backend(app):
+    """Create the backend selected by RESPONSE_CACHE_BACKEND, or None if caching is disabled."""
+    name = app.config.get('RESPONSE_CACHE_BACKEND', 'none')
+    ttl = app.config.get('RESPONSE_CACHE_TTL', 300)
+    path = app.config.get('RESPONSE_CACHE_PATH', os.path.join(app.instance_path, 'response_cache.db'))
+    if name == 'memory':
+        return MemoryBackend(SQLiteVersions(path), app.config.get('RESPONSE_CACHE_SIZE', 512), ttl)
+    if name == 'sqlite':
+        return SQLiteBackend(path, ttl)
+    if name != 'none':
+        raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {name}")
+    return None
+
+def cached_page(view):
+    """Serve a rendered page from the response cache when the user's data did not change."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        response_cache = current_app.extensions.get('response_cache')
+        # Pages with pending flash messages are one-off and never cached
+        if response_cache is None or not current_user.is_authenticated or '_flashes' in session:
+            return view(*args, **kwargs)
+
+        key = response_cache.key(current_user.id)
+        body = response_cache.backend.get(key)
+        if body is not None:
+            response_cache.hits += 1
+            metrics.inc('flask_notes_cache_requests_total', cache='response', result='hit')
+            response = make_response(body)
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        response_cache.misses += 1
+        metrics.inc('flask_notes_cache_requests_total', cache='response', result='miss')
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and '_flashes' not in session:
+            response_cache.backend.set(key, response.get_data())
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapped
+
+def init_app(app):
+    """Set up the response cache and invalidate a user's pages after each write request."""
+    backend = create_backend(app)
+    app.extensions['response_cache'] = ResponseCache(backend) if backend is not None else None
+
+    @app.after_request
+    def invalidate_after_write(response):
+        response_cache = app.extensions.get('response_cache')
+        if response_cache is not None and request.method not in SAFE_METHODS and current_user.is_authenticated:
+            response_cache.invalidate_user(current_user.id)
+        return response
@@ -0,0 +1,125 @@
+"""
+Full-text search for notes.
+Uses an SQLite FTS5 index or a PostgreSQL tsvector/GIN index depending on the database,
+with a LIKE fallback for databases without a search index.
+"""
+import re
+import sqlite3
+
+from sqlalchemy import DDL, event, func, literal_column, table, column, text
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.expression import UnaryExpression
+from models.database import db, Note
+
+# Search index definitions (SQLite FTS5 external content table kept in sync by triggers)
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+    "title, content, content='notes', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN "
+    "INSERT INTO notes_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF title, content ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO notes_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+]
+SQLITE_FTS_DROP = "DROP TABLE IF EXISTS notes_fts"
+
+# PostgreSQL expression index, maintained by the database on every write
+POSTGRES_SEARCH_CONFIG = 'simple'
+POSTGRES_GIN_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_notes_search_vector ON notes USING gin "
+    "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(content, '')))"
+)
+
+# Title matches rank higher than content matches
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+notes_fts = table('notes_fts', column('rowid'))
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Note.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Note.__table__, 'after_create', DDL(POSTGRES_GIN_DDL).execute_if(dialect='postgresql'))
+event.listen(Note.__table__, 'before_drop', DDL(SQLITE_FTS_DROP).execute_if(dialect='sqlite'))
+
+# Engines known to have the FTS5 table (positive results only, so a later backfill is picked up)
+_fts_engines = set()
+
+def tokenize(search_query):
+    """Split a search query into word tokens safe for FTS5 and tsquery syntax."""
+    return re.findall(r'\w+', search_query, flags=re.UNICODE)
+
+def sqlite_fts_available():
+    """Check whether the FTS5 search table exists for the current engine."""
+    engine = db.engine
+    if engine in _fts_engines:
+        return True
+    with engine.connect() as conn:
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'")).first()
+    if exists:
+        _fts_engines.add(engine)
+    return bool(exists)
+
+def reset_cache():
+    """Forget which engines have a search index (used after rebuilding it)."""
+    _fts_engines.clear()
+
+def postgres_vector():
+    """Return the tsvector expression matching the GIN index definition."""
+    document = func.coalesce(Note.title, '') + ' ' + func.coalesce(Note.content, '')
+    return func.to_tsvector(POSTGRES_SEARCH_CONFIG, document)
+
+def apply_search(query, search_query, user_id=None):
+    """Filter a Note query by a search string and order it by relevance.
+
+    Every word is matched as a prefix, and all words must match. Pass the user_id the
+    query is filtered by, so the SQLite index lookup only ranks that user's notes.
+    """
+    tokens = tokenize(search_query)
+    dialect = db.engine.dialect.name
+
+    if tokens and dialect == 'sqlite' and sqlite_fts_available():
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        rank = func.bm25(literal_column('notes_fts'), TITLE_WEIGHT, CONTENT_WEIGHT)
+        ranked = (db.select(notes_fts.c.rowid.label('id'), rank.label('rank'))
+                  .where(literal_column('notes_fts').op('MATCH')(match)))
+        if user_id is not None:
+            # Rank only the user's matches; the unary + keeps SQLite from driving the join from the
+            # user_id index, which would run one MATCH per note of the user
+            notes = Note.__table__
+            user_column = UnaryExpression(notes.c.user_id, operator=operators.custom_op('+'))
+            ranked = ranked.join(notes, notes.c.id == notes_fts.c.rowid).where(user_column == user_id)
+        ranked = ranked.cte('ranked', nesting=True)
+        # Without materializing, SQLite may plan the COUNT of a page as one MATCH per note of the user
+        if sqlite3.sqlite_version_info >= (3, 35):
+            ranked = ranked.prefix_with('MATERIALIZED')
+        return query.join(ranked, ranked.c.id == Note.id).order_by(ranked.c.rank)
+
+    if tokens and dialect == 'postgresql':
+        vector = postgres_vector()
+        ts_query = func.to_tsquery(POSTGRES_SEARCH_CONFIG, ' & '.join(f'{token}:*' for token in tokens))
+        return query.filter(vector.op('@@')(ts_query)).order_by(func.ts_rank(vector, ts_query).desc())
+
+    # Fallback: substring scan
+    return query.filter(db.or_(Note.title.contains(search_query), Note.content.contains(search_query)))
+
+def rebuild_index():
+    """Create the search index if missing and (re)fill it from the notes table.
+
+    Returns the name of the index backend that was rebuilt, or None if unsupported.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')"))
+        db.session.commit()
+        reset_cache()
+        return 'fts5'
+    if dialect == 'postgresql':
+        db.session.execute(text(POSTGRES_GIN_DDL))
+        db.session.execute(text('REINDEX INDEX ix_notes_search_vector'))
+        db.session.commit()
+        return 'gin'
+    return None
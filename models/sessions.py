@@ -0,0 +1,190 @@
+"""
+Server-side sessions for Flask Notes app.
+Keeps session data in an SQLite file shared by all worker processes (a local stand-in for a
+shared key-value store such as Redis); the cookie only carries an opaque session ID. Data is
+loaded on first access, so requests that never touch the session skip the lookup, and a
+background thread deletes expired sessions.
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+
+# Keys set and removed within one request (Flask-Login checks '_remember' after every request)
+REQUEST_SCOPED_KEYS = frozenset({'_remember'})
+
+class SQLiteSessionStore:
+    """Session data by ID in an SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL) WITHOUT ROWID")
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid):
+        row = self._connect().execute("SELECT data FROM sessions WHERE id = ? AND expires > ?", (sid, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid, data, expires):
+        self._connect().execute("INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)", (sid, data, expires))
+
+    def touch(self, sid, expires):
+        self._connect().execute("UPDATE sessions SET expires = ? WHERE id = ?", (expires, sid))
+
+    def delete(self, sid):
+        self._connect().execute("DELETE FROM sessions WHERE id = ?", (sid,))
+
+    def purge(self):
+        """Delete expired sessions and return how many were removed."""
+        return self._connect().execute("DELETE FROM sessions WHERE expires <= ?", (time.time(),)).rowcount
+
+class ServerSideSession(SessionMixin):
+    """Session whose data is read from the store on first access."""
+
+    def __init__(self, store, serializer, sid=None):
+        self.sid = sid
+        self._store = store
+        self._serializer = serializer
+        self._data = None if sid else {}
+        self._user_id = None
+        self.new = sid is None
+        self.modified = False
+        self.accessed = False
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        if self._data is None:
+            raw = self._store.get(self.sid)
+            if raw is None:
+                # Unknown or expired ID: never adopt an ID chosen by the client
+                self.sid = None
+                self.new = True
+                self._data = {}
+            else:
+                self._data = self._serializer.loads(raw)
+            self._user_id = self._data.get('_user_id')
+        self.accessed = True
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        # Request-scoped keys are never stored, so an unloaded session cannot contain them
+        if self._data is None and key in REQUEST_SCOPED_KEYS:
+            return False
+        return key in self.data
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f'<ServerSideSession {self.sid} {self._data!r}>'
+
+class ServerSideSessionInterface(SessionInterface):
+    """Session interface storing data server-side under an opaque cookie ID."""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, purge_interval=300):
+        self.store = store
+        self.purge_interval = purge_interval
+        self._purger_pid = None
+        self._lock = threading.Lock()
+
+    def start_purger(self):
+        """Start the expiry thread once per process (worker processes may be forked after startup)."""
+        if self.purge_interval <= 0 or self._purger_pid == os.getpid():
+            return
+        with self._lock:
+            if self._purger_pid == os.getpid():
+                return
+            self._purger_pid = os.getpid()
+            threading.Thread(target=self._purge_loop, name='session-purger', daemon=True).start()
+
+    def _purge_loop(self):
+        while True:
+            time.sleep(self.purge_interval)
+            try:
+                self.store.purge()
+            except sqlite3.Error:
+                pass  # Locked by another worker's purge, retry next interval
+
+    def open_session(self, app, request):
+        self.start_purger()
+        return ServerSideSession(self.store, self.serializer, request.cookies.get(self.get_cookie_name(app)))
+
+    def save_session(self, app, session, response):
+        if not session.loaded:
+            return
+        response.vary.add('Cookie')
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+        partitioned = self.get_cookie_partitioned(app)
+
+        if not session:
+            if session.modified and session.sid is not None:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure, samesite=samesite, httponly=httponly, partitioned=partitioned)
+            return
+
+        expires = time.time() + app.permanent_session_lifetime.total_seconds()
+        if session.modified:
+            # A new ID when the logged-in user changes, so a planted session ID is useless
+            if session.sid is not None and session.get('_user_id') != session._user_id:
+                self.store.delete(session.sid)
+                session.sid = None
+            if session.sid is None:
+                session.sid = secrets.token_urlsafe(32)
+            self.store.set(session.sid, self.serializer.dumps(dict(session)), expires)
+        elif self.should_set_cookie(app, session):
+            self.store.touch(session.sid, expires)
+        else:
+            return
+        response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                            domain=domain, path=path, secure=secure, samesite=samesite, httponly=httponly, partitioned=partitioned)
+
+def init_app(app):
+    """Replace the signed cookie session with server-side sessions if SESSION_BACKEND is 'sqlite'."""
+    backend = app.config.get('SESSION_BACKEND', 'cookie')
+    if backend == 'sqlite':
+        store = SQLiteSessionStore(app.config.get('SESSION_PATH', os.path.join(app.instance_path, 'sessions.db')))
+        app.session_interface = ServerSideSessionInterface(store, app.config.get('SESSION_PURGE_INTERVAL', 300))
+    elif backend != 'cookie':
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
@@ -1,6 +1,7 @@
 $(document).ready(function () {
     const NoteManager = {
         currentNote: {},
+        contentCache: {},
 
         // Initialize all modal handlers
         init() {
@@ -28,19 +29,43 @@ $(document).ready(function () {
         extractNoteData($button) {
             return {
                 id: $button.data('note-id'),
+                url: $button.data('note-url'),
                 title: $button.data('note-title'),
-                content: $button.data('note-content'),
                 category: $button.data('note-category')
             };
         },
 
+        // Load the full note content (the list only ships previews)
+        loadContent(noteData) {
+            if (noteData.id in this.contentCache) {
+                return $.Deferred().resolve(this.contentCache[noteData.id]).promise();
+            }
+            return $.getJSON(noteData.url).then((note) => {
+                this.contentCache[noteData.id] = note.content;
+                return note.content;
+            });
+        },
+
         // Populate edit modal with note data
         populateEditModal(noteData) {
+            this.currentNote = noteData;
             const updateUrl = $('#editForm').data('update-url').replace('/0', `/${noteData.id}`);
             $('#editForm').attr('action', updateUrl);
             $('#editNoteTitle').val(noteData.title);
-            $('#editNoteContent').val(noteData.content);
             $('#editNoteCategory').val(noteData.category || 0);
+
+            // Keep the content field disabled until the full text has arrived
+            const $content = $('#editNoteContent').val('').prop('disabled', true).removeClass('is-invalid');
+            this.loadContent(noteData).then((content) => {
+                // Ignore responses for a note that is no longer open
+                if (noteData.id === this.currentNote.id) {
+                    $content.val(content).prop('disabled', false);
+                }
+            }).fail(() => {
+                if (noteData.id === this.currentNote.id) {
+                    $content.prop('disabled', false).addClass('is-invalid');
+                }
+            });
         },
 
         // Handle view modal display
@@ -49,7 +74,16 @@ $(document).ready(function () {
                 const noteData = this.extractNoteData($(event.relatedTarget));
                 this.currentNote = noteData;
                 $('#viewNoteTitle').text(noteData.title);
-                $('#viewNoteContent').text(noteData.content);
+                $('#viewNoteContent').text('');
+                this.loadContent(noteData).then((content) => {
+                    if (noteData.id === this.currentNote.id) {
+                        $('#viewNoteContent').text(content);
+                    }
+                }).fail(() => {
+                    if (noteData.id === this.currentNote.id) {
+                        $('#viewNoteContent').text($('#noteLoadError').text());
+                    }
+                });
             });
         },
 
@@ -89,6 +123,7 @@ $(document).ready(function () {
                 const currentUrl = new URL(window.location);
                 currentUrl.searchParams.set('archived', isChecked);
                 currentUrl.searchParams.set('page', '1'); // Reset to first page
+                currentUrl.searchParams.delete('cursor'); // A cursor from the other list is meaningless
                 window.location.href = currentUrl.toString();
             });
         },
@@ -1,12 +1,17 @@
 import sys
 import os
+import time
+from contextlib import contextmanager
 import pytest
+from flask import g, template_rendered
+from sqlalchemy import event
 
 # Get the parent directory (necessary for imports)
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from app import create_app
-from models.database import db, Note, User
+from models.database import db, Note, User, Category, attach_categories
+from models import cache, response_cache
 
 @pytest.fixture
 def client():
@@ -40,6 +45,47 @@ def client():
         db.session.remove()
         db.drop_all()
 
+@contextmanager
+def count_queries():
+    """Count SQL statements executed on the current engine."""
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+@contextmanager
+def captured_templates():
+    """Record (template, context) pairs rendered while the block runs."""
+    recorded = []
+    def record(sender, template, context, **extra):
+        recorded.append((template, context))
+    template_rendered.connect(record)
+    try:
+        yield recorded
+    finally:
+        template_rendered.disconnect(record)
+
+@contextmanager
+def configured_client(**config):
+    """Logged-in test client for an app created with extra configuration (for settings read at startup)."""
+    app = create_app(config={'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'WTF_CSRF_ENABLED': False, **config})
+    with app.app_context():
+        db.create_all()
+        user = User(username='testuser')
+        user.set_password('testpassword')
+        db.session.add(user)
+        db.session.commit()
+        with app.test_client() as test_client:
+            with test_client.session_transaction() as sess:
+                sess['_user_id'] = str(user.id)
+            yield test_client
+        db.session.remove()
+        db.drop_all()
+
 # Basic test to check if the index page loads correctly
 def test_index(client):
     """Test that the index page loads successfully."""
@@ -135,3 +181,1021 @@ def test_update_nonexistent_note(client):
     })
     assert resp.status_code == 404
 
+
+# Test full-text search with prefix matching
+def test_search_prefix_match(client):
+    """Test that search matches word prefixes via the full-text index."""
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    db.session.add(Note(title="Groceries", content="Buy apples and bananas", user_id=user_id))
+    db.session.add(Note(title="Meeting", content="Discuss roadmap", user_id=user_id))
+    db.session.commit()
+
+    resp = client.get("/notes/?search=appl")
+    assert b"Groceries" in resp.data
+    assert b"Meeting" not in resp.data
+
+    # Only the user's matches are ranked, found through the index rather than one MATCH per note
+    from blueprints.notes import filter_notes
+    other_user = User(username='otheruser', password_hash='x')
+    db.session.add(other_user)
+    db.session.commit()
+    db.session.add(Note(title="Apple pie", content="Other user's recipe", user_id=other_user.id))
+    db.session.commit()
+    query = filter_notes(user_id, 'appl')
+    assert [note.title for note in query] == ["Groceries"]
+    compiled = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    plan = ' '.join(row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert 'SCAN notes_fts VIRTUAL TABLE INDEX 0:M' in plan
+
+# Test that search results are ranked and the index follows updates
+def test_search_ranking_and_sync(client):
+    """Test that title matches rank first and updated/deleted notes are reindexed."""
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    body_match = Note(title="Misc", content="Something about python", user_id=user_id)
+    title_match = Note(title="Python tips", content="Use virtualenvs", user_id=user_id)
+    db.session.add_all([body_match, title_match])
+    db.session.commit()
+
+    resp = client.get("/notes/?search=python")
+    assert resp.data.index(b"Python tips") < resp.data.index(b"Misc")
+
+    # Update removes old terms from the index
+    title_match.title = "Rust tips"
+    db.session.commit()
+    resp = client.get("/notes/?search=python")
+    assert b"Rust tips" not in resp.data
+
+    # Delete removes the note from the index
+    db.session.delete(body_match)
+    db.session.commit()
+    resp = client.get("/notes/?search=python")
+    assert b"Misc" not in resp.data
+
+# Test that the notes page issues a fixed number of queries
+def test_index_query_count_independent_of_notes(client):
+    """Test that rendering category badges does not lazy-load one category per note."""
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    def page_query_count():
+        db.session.expire_all()  # Force every row to be reloaded by the request
+        with count_queries() as statements:
+            resp = client.get("/notes/")
+        assert resp.status_code == 200
+        return len(statements)
+
+    category = Category(name="Work", color="#ff0000", user_id=user_id)
+    db.session.add(category)
+    db.session.commit()
+    db.session.add(Note(title="First", content="One", category_id=category.id, user_id=user_id))
+    db.session.commit()
+    baseline = page_query_count()
+
+    # Fill a whole page with notes in distinct categories
+    for i in range(6):
+        other = Category(name=f"Category {i}", color="#00ff00", user_id=user_id)
+        db.session.add(other)
+        db.session.flush()
+        db.session.add(Note(title=f"Note {i}", content="Text", category_id=other.id, user_id=user_id))
+    db.session.commit()
+
+    assert page_query_count() == baseline
+
+# Test attaching preloaded categories to notes
+def test_attach_categories_without_queries(client):
+    """Test that attach_categories fills note.category without touching the database."""
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    category = Category(name="Work", color="#ff0000", user_id=user_id)
+    db.session.add(category)
+    db.session.commit()
+    db.session.add_all([
+        Note(title="Categorized", content="One", category_id=category.id, user_id=user_id),
+        Note(title="Uncategorized", content="Two", user_id=user_id)
+    ])
+    db.session.commit()
+
+    categories = Category.query.all()
+    db.session.expunge_all()
+    notes = Note.query.order_by(Note.id).all()
+
+    with count_queries() as statements:
+        attach_categories(notes, categories)
+        assert notes[0].category.name == "Work"
+        assert notes[1].category is None
+        assert notes[0].to_dict()['category']['name'] == "Work"
+    assert statements == []
+
+# Test category note counts
+def test_category_counts(client):
+    """Test that the categories page shows per-category counts from a single grouped query."""
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    work = Category(name="Work", color="#ff0000", user_id=user_id)
+    home = Category(name="Home", color="#00ff00", user_id=user_id)
+    db.session.add_all([work, home])
+    db.session.commit()
+    db.session.add_all([
+        Note(title="W1", content="x", category_id=work.id, user_id=user_id),
+        Note(title="W2", content="x", category_id=work.id, user_id=user_id),
+        Note(title="W3", content="x", category_id=work.id, user_id=user_id, archived=True),
+        Note(title="U1", content="x", user_id=user_id)
+    ])
+    db.session.commit()
+
+    with count_queries() as statements, captured_templates() as templates:
+        resp = client.get("/categories/")
+    assert resp.status_code == 200
+    assert len([s for s in statements if 'count(notes.id)' in s]) == 1
+
+    _, context = templates[0]
+    assert context['category_counts'] == {work.id: 2}
+    assert context['uncategorized_count'] == 1
+
+# Test that listing queries use the composite indexes
+def test_listing_queries_use_indexes(client):
+    """Test with EXPLAIN QUERY PLAN that notes and categories listings hit their indexes."""
+    def query_plan(query):
+        compiled = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        return ' '.join(row[-1] for row in rows)
+
+    # The statements notes.index runs for the first page and for walking forward and backward
+    client.application.config['PAGINATION_MODE'] = 'keyset'
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+    for i in range(8):
+        db.session.add(Note(title=f"Indexed note {i}", content="x", user_id=user_id))
+    db.session.commit()
+    with captured_templates() as templates:
+        client.get("/notes/")
+        next_cursor = templates[-1][1]['next_cursor']
+        client.get(f"/notes/?cursor={next_cursor}")
+        prev_cursor = templates[-1][1]['prev_cursor']
+
+    executed = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT') and 'ORDER BY notes.updated_at' in statement:
+            executed.append((statement, parameters))
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        for url in ("/notes/", f"/notes/?cursor={next_cursor}", f"/notes/?cursor={prev_cursor}"):
+            client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert len(executed) == 3
+    for statement, parameters in executed:
+        notes_plan = ' '.join(row[-1] for row in db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+        assert 'ix_notes_user_id_archived_updated_at' in notes_plan
+        assert 'TEMP B-TREE' not in notes_plan  # Sorted by the index, not in memory
+
+    category_plan = query_plan(Note.query.filter_by(user_id=1, category_id=2, archived=False))
+    assert 'ix_notes_user_id_category_id_archived' in category_plan
+
+    categories_plan = query_plan(Category.query.filter_by(user_id=1).order_by(Category.name))
+    assert 'ix_categories_user_id_name' in categories_plan
+    assert 'TEMP B-TREE' not in categories_plan
+
+# Test keyset pagination of notes
+def test_notes_keyset_pagination(client):
+    """Test walking notes forward and backward with cursors."""
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    client.application.config['PAGINATION_MODE'] = 'keyset'
+    for i in range(8):
+        db.session.add(Note(title=f"Keyset note {i}", content="x", user_id=user_id))
+    db.session.commit()
+
+    with captured_templates() as templates:
+        client.get("/notes/")
+        first = templates[-1][1]
+        assert [note.title for note in first['notes']] == [f"Keyset note {i}" for i in range(7, 1, -1)]
+        assert first['prev_cursor'] is None and first['next_cursor']
+        assert first['total_notes'] == 8
+
+        client.get(f"/notes/?cursor={first['next_cursor']}")
+        second = templates[-1][1]
+        assert [note.title for note in second['notes']] == ["Keyset note 1", "Keyset note 0"]
+        assert second['next_cursor'] is None and second['prev_cursor']
+
+        client.get(f"/notes/?cursor={second['prev_cursor']}")
+        back = templates[-1][1]
+        assert [note.id for note in back['notes']] == [note.id for note in first['notes']]
+        assert back['prev_cursor'] is None
+
+        # Invalid cursors fall back to the first page
+        resp = client.get("/notes/?cursor=not-a-cursor")
+        assert resp.status_code == 200
+        assert templates[-1][1]['notes'][0].title == "Keyset note 7"
+
+# Test keyset pagination of categories without total count
+def test_categories_keyset_pagination_without_count(client):
+    """Test that categories paginate by (name, id) cursors and can skip the total count."""
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    client.application.config.update(PAGINATION_MODE='keyset', PAGINATION_COUNT=False)
+    for i in range(12):
+        db.session.add(Category(name=f"Category {i:02d}", user_id=user_id))
+    db.session.commit()
+
+    with count_queries() as statements, captured_templates() as templates:
+        client.get("/categories/")
+    context = templates[-1][1]
+    assert [category.name for category in context['categories']][:2] == ["Category 00", "Category 01"]
+    assert context['total_categories'] is None
+    assert not any('count(*)' in statement for statement in statements)
+
+    with captured_templates() as templates:
+        client.get(f"/categories/?cursor={context['next_cursor']}")
+    assert [category.name for category in templates[-1][1]['categories']] == ["Category 10", "Category 11"]
+
+# Test JSON API create/get with conditional requests
+def test_api_note_conditional_get(client):
+    """Test that the API returns ETag/Last-Modified and answers 304 for unchanged notes."""
+    resp = client.post("/api/v1/notes", json={"title": "API note", "content": "Body"})
+    assert resp.status_code == 201
+    note_id = resp.get_json()['id']
+    etag = resp.headers['ETag']
+
+    resp = client.get(f"/api/v1/notes/{note_id}")
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] == etag
+    assert resp.get_json()['title'] == "API note"
+
+    resp = client.get(f"/api/v1/notes/{note_id}", headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert resp.data == b''
+
+    last_modified = client.get(f"/api/v1/notes/{note_id}").headers['Last-Modified']
+    resp = client.get(f"/api/v1/notes/{note_id}", headers={'If-Modified-Since': last_modified})
+    assert resp.status_code == 304
+
+    resp = client.get("/api/v1/notes")
+    assert [note['id'] for note in resp.get_json()['notes']] == [note_id]
+    resp = client.get("/api/v1/notes", headers={'If-None-Match': resp.headers['ETag']})
+    assert resp.status_code == 304
+
+# Test JSON API optimistic concurrency
+def test_api_note_if_match(client):
+    """Test that updates with a stale If-Match fail with 412 and fresh ones succeed."""
+    resp = client.post("/api/v1/notes", json={"title": "Original", "content": "Body"})
+    note_id = resp.get_json()['id']
+    etag = resp.headers['ETag']
+
+    resp = client.put(f"/api/v1/notes/{note_id}", json={"title": "First edit", "content": "Body"}, headers={'If-Match': etag})
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] != etag
+
+    # A second client still holding the old ETag loses
+    resp = client.put(f"/api/v1/notes/{note_id}", json={"title": "Second edit", "content": "Body"}, headers={'If-Match': etag})
+    assert resp.status_code == 412
+    assert client.get(f"/api/v1/notes/{note_id}").get_json()['title'] == "First edit"
+
+    resp = client.put(f"/api/v1/notes/{note_id}", json={"title": ""})
+    assert resp.status_code == 400
+    assert 'title' in resp.get_json()['errors']
+
+    resp = client.post(f"/api/v1/notes/{note_id}/archive", json={"archived": True})
+    assert resp.get_json()['archived'] is True
+
+    # Only real booleans in an object body are accepted; strings like "false" are not truthy archives
+    for payload in ({"archived": "false"}, {"archived": 0}, ["archived"], "archived"):
+        resp = client.post(f"/api/v1/notes/{note_id}/archive", json=payload)
+        assert resp.status_code == 400, payload
+    resp = client.post(f"/api/v1/notes/{note_id}/archive", json={"archived": False})
+    assert resp.get_json()['archived'] is False
+    resp = client.post(f"/api/v1/notes/{note_id}/archive")
+    assert resp.get_json()['archived'] is True
+
+    resp = client.delete(f"/api/v1/notes/{note_id}")
+    assert resp.status_code == 204
+    assert client.get(f"/api/v1/notes/{note_id}").status_code == 404
+
+# Test JSON API input types
+def test_api_rejects_non_string_fields(client):
+    """Test that non-string titles/contents and non-integer categories get 400 instead of a server error."""
+    for payload in ({"title": 123, "content": "Body"}, {"title": "Title", "content": {"text": "Body"}},
+                    {"title": ["First", "Second"], "content": "Body"}, {"title": "Title", "content": "Body", "category_id": True}):
+        resp = client.post("/api/v1/notes", json=payload)
+        assert resp.status_code == 400, payload
+        assert 'error' in resp.get_json()
+    assert Note.query.count() == 0
+
+    note_id = client.post("/api/v1/notes", json={"title": "Typed", "content": "Body"}).get_json()['id']
+    resp = client.put(f"/api/v1/notes/{note_id}", json={"title": "Typed", "content": ["Body"]})
+    assert resp.status_code == 400
+    assert client.get(f"/api/v1/notes/{note_id}").get_json()['content'] == "Body"
+
+# Test JSON API authentication
+def test_api_requires_login(client):
+    """Test that anonymous API requests get 401 JSON instead of a login redirect."""
+    with client.session_transaction() as sess:
+        sess.clear()
+    resp = client.get("/api/v1/notes")
+    assert resp.status_code == 401
+    assert resp.is_json
+
+# Test bulk note operations
+def test_api_bulk_operations(client):
+    """Test set-based bulk archive, recategorize and delete by ids and by filter."""
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    other_user = User(username='otheruser', password_hash='x')
+    category = Category(name="Bulk", user_id=user_id)
+    db.session.add_all([other_user, category])
+    db.session.commit()
+    notes = [Note(title=f"Bulk {i}", content="cleanup" if i % 2 else "keep", user_id=user_id) for i in range(6)]
+    foreign = Note(title="Foreign", content="cleanup", user_id=other_user.id)
+    db.session.add_all(notes + [foreign])
+    db.session.commit()
+    ids = [note.id for note in notes]
+
+    with count_queries() as statements:
+        resp = client.post("/api/v1/notes/bulk", json={"action": "archive", "ids": ids[:3] + [foreign.id]})
+    assert resp.get_json()['affected'] == 3
+    assert len([s for s in statements if s.startswith('UPDATE notes')]) == 1
+
+    resp = client.post("/api/v1/notes/bulk", json={"action": "recategorize", "category_id": category.id, "filter": {"search": "cleanup"}})
+    assert resp.get_json()['affected'] == 2  # Only unarchived matches of this user
+
+    # "false" must not select the archived notes
+    resp = client.post("/api/v1/notes/bulk", json={"action": "delete", "filter": {"archived": "false"}})
+    assert resp.status_code == 400
+    resp = client.post("/api/v1/notes/bulk", json={"action": "delete", "filter": {"archived": True}})
+    assert resp.get_json()['affected'] == 3
+
+    db.session.expire_all()
+    assert Note.query.filter_by(user_id=user_id).count() == 3
+    assert db.session.get(Note, ids[5]).category_id == category.id
+    assert db.session.get(Note, foreign.id).archived is False
+
+    resp = client.post("/api/v1/notes/bulk", json={"action": "explode", "ids": ids})
+    assert resp.status_code == 400
+    # JSON booleans are not ids (True would match note 1)
+    resp = client.post("/api/v1/notes/bulk", json={"action": "delete", "ids": [True]})
+    assert resp.status_code == 400
+
+# Test bulk note import
+def test_api_import_notes(client):
+    """Test that imported notes are inserted together and invalid batches are rejected."""
+    resp = client.post("/api/v1/notes/import", json={"notes": [{"title": "Imported", "content": ""}]})
+    assert resp.status_code == 400
+    assert '0' in resp.get_json()['errors']
+
+    # Whitespace-only fields and boolean categories fail like they do in NoteForm
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+    category = Category(name="Import", user_id=user_id)
+    db.session.add(category)
+    db.session.commit()
+    resp = client.post("/api/v1/notes/import", json={"notes": [
+        {"title": "   ", "content": "x"}, {"title": "Blank", "content": " \n "},
+        {"title": "Flag", "content": "x", "category_id": True}, {"title": "Valid", "content": "x", "category_id": category.id}]})
+    assert resp.status_code == 400
+    assert set(resp.get_json()['errors']) == {'0', '1', '2'}
+
+    with count_queries() as statements:
+        resp = client.post("/api/v1/notes/import", json={"notes": [{"title": f"Imported {i}", "content": "x"} for i in range(50)]})
+    assert resp.status_code == 201
+    assert resp.get_json()['imported'] == 50
+    assert len([s for s in statements if s.startswith('INSERT INTO notes')]) == 1
+
+    resp = client.get("/notes/?search=Imported")
+    assert b"Imported 49" in resp.data
+
+# Benchmark category deletion memory
+def test_category_delete_memory_is_constant(client):
+    """Test that deleting a category uses one UPDATE and memory independent of its note count."""
+    import tracemalloc
+
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    def delete_category_with_notes(note_count):
+        category = Category(name=f"Size {note_count}", user_id=user_id)
+        db.session.add(category)
+        db.session.commit()
+        db.session.execute(db.insert(Note), [
+            {'title': f"Note {i}", 'content': "x" * 200, 'user_id': user_id, 'category_id': category.id} for i in range(note_count)
+        ])
+        db.session.commit()
+        category_id = category.id
+
+        tracemalloc.start()
+        with count_queries() as statements:
+            resp = client.post(f"/categories/delete/{category_id}")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert resp.status_code == 302
+        assert Note.query.filter_by(category_id=category_id).count() == 0
+        assert len([s for s in statements if s.startswith('UPDATE notes')]) == 1
+        return peak
+
+    delete_category_with_notes(10)  # Warm up caches
+    small = delete_category_with_notes(10)
+    large = delete_category_with_notes(5000)
+    assert large < small * 1.5
+
+# Test request-scoped category cache
+def test_categories_queried_once_per_request(client):
+    """Test that the notes page shares one category query between the form and the filter dropdown."""
+    with count_queries() as statements:
+        client.get("/notes/")
+    assert len([s for s in statements if 'FROM categories' in s]) == 1
+
+# Test cross-request category cache with invalidation
+def test_category_cache_across_requests(client):
+    """Test that the shared category cache skips queries and is invalidated by category changes."""
+    app = client.application
+    app.config['CATEGORY_CACHE_TTL'] = 60
+    cache.init_app(app)
+
+    client.post("/categories/add", data={"name": "Cached", "color": "#123456"})
+    client.get("/notes/")
+    with count_queries() as statements:
+        resp = client.get("/notes/")
+    assert b"Cached" in resp.data
+    assert not any('FROM categories' in s for s in statements)
+
+    # Adding a category invalidates the cached list
+    client.post("/categories/add", data={"name": "Fresh", "color": "#654321"})
+    resp = client.get("/notes/")
+    assert b"Fresh" in resp.data
+
+# Test rendered page cache
+def test_notes_page_response_cache(client, tmp_path):
+    """Test that notes pages are served from cache until the user writes something."""
+    app = client.application
+    app.config['RESPONSE_CACHE_BACKEND'] = 'memory'
+    app.config['RESPONSE_CACHE_PATH'] = str(tmp_path / "cache.db")
+    response_cache.init_app(app)
+
+    first = client.get("/notes/")
+    assert first.headers['X-Cache'] == 'MISS'
+    with count_queries() as statements:
+        second = client.get("/notes/")
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.data == first.data
+    assert not any('FROM notes' in s for s in statements)
+
+    # Different filters are cached separately
+    assert client.get("/notes/?archived=true").headers['X-Cache'] == 'MISS'
+
+    # Writing bumps the user's version, so the next page is fresh
+    client.post("/notes/add", data={"title": "Fresh note", "content": "New"})
+    client.get("/notes/")  # Consumes the flash message without caching
+    resp = client.get("/notes/")
+    assert resp.headers['X-Cache'] == 'MISS'
+    assert b"Fresh note" in resp.data
+
+    stats = app.extensions['response_cache'].stats()
+    assert stats['hits'] == 1 and stats['misses'] == 3
+
+# Test shared SQLite cache backend
+def test_sqlite_response_cache_shared_between_workers(tmp_path):
+    """Test that two workers using the same SQLite file share pages and versions."""
+    from models.response_cache import SQLiteBackend
+    path = str(tmp_path / "cache.db")
+    worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+
+    worker_a.set("page:1", b"<html>")
+    assert worker_b.get("page:1") == b"<html>"
+
+    worker_a.bump_version(1)
+    worker_a.bump_version(1)
+    assert worker_b.get_version(1) == 2
+    assert worker_b.get_version(2) == 0
+
+    expired = SQLiteBackend(path, ttl=-1)
+    expired.set("page:2", b"old")
+    assert worker_a.get("page:2") is None
+    # Expired rows are deleted periodically, not on every write
+    expired.set("page:3", b"old")
+    assert expired.purge() == 1
+
+# Test memory cache backend invalidation across workers
+def test_memory_response_cache_versions_shared(tmp_path):
+    """Test that a write in one worker makes pages cached in another worker's memory stale."""
+    from models.response_cache import MemoryBackend, SQLiteVersions
+    path = str(tmp_path / "cache.db")
+    worker_a, worker_b = MemoryBackend(SQLiteVersions(path)), MemoryBackend(SQLiteVersions(path))
+
+    worker_a.set("page:1", b"<html>")
+    assert worker_b.get("page:1") is None
+    version = worker_a.get_version(1)
+    worker_b.bump_version(1)
+    assert worker_a.get_version(1) == version + 1
+
+# Test that the notes list ships previews instead of full content
+def test_index_ships_previews(client):
+    """Test that long notes are truncated in the list and fully available from the JSON endpoint."""
+    with client.session_transaction() as sess:
+        user_id = int(sess['_user_id'])
+
+    content = "start " + "x" * 5000 + " ENDMARKER"
+    note = Note(title="Long note", content=content, user_id=user_id)
+    db.session.add(note)
+    db.session.commit()
+    db.session.expire_all()
+
+    with count_queries() as statements:
+        resp = client.get("/notes/")
+    assert b"start " in resp.data
+    assert b"ENDMARKER" not in resp.data
+    assert b"data-note-url" in resp.data
+    row_queries = [s for s in statements if 'FROM notes' in s and not s.startswith('SELECT count')]
+    assert row_queries and not any('notes.content AS notes_content' in s for s in row_queries)
+
+    resp = client.get(f"/api/v1/notes/{note.id}")
+    assert resp.get_json()['content'] == content
+
+# Test static asset fingerprinting and caching
+def test_static_assets_fingerprinted(client):
+    """Test that static URLs carry a content hash and fingerprinted files are cached as immutable."""
+    resp = client.get("/notes/")
+    assert b"/static/js/notes.js?v=" in resp.data
+
+    with client.application.test_request_context():
+        from flask import url_for
+        url = url_for('static', filename='js/notes.js')
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert 'immutable' in resp.headers['Cache-Control']
+
+    # Stale or missing versions must be revalidated
+    assert 'immutable' not in client.get("/static/js/notes.js?v=stale").headers.get('Cache-Control', '')
+
+# Test precompressed static variants
+def test_static_precompressed_variant(client):
+    """Test that compress-assets output is served to clients accepting gzip."""
+    import gzip
+    static_folder = client.application.static_folder
+    path = os.path.join(static_folder, 'js', 'notes.js')
+    try:
+        result = client.application.test_cli_runner().invoke(args=['compress-assets'])
+        assert 'Compressed' in result.output
+        resp = client.get("/static/js/notes.js", headers={'Accept-Encoding': 'gzip'})
+        assert resp.headers['Content-Encoding'] == 'gzip'
+        assert resp.mimetype == 'text/javascript'
+        with open(path, 'rb') as f:
+            assert gzip.decompress(resp.data) == f.read()
+        resp = client.get("/static/js/notes.js")
+        assert 'Content-Encoding' not in resp.headers
+
+        # A source edited after compressing must not be served from its stale variant
+        with open(path, 'rb') as f:
+            source = f.read()
+        os.utime(path, (os.path.getatime(path), os.path.getmtime(path + '.gz') + 1))
+        resp = client.get("/static/js/notes.js", headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in resp.headers
+        assert resp.data == source
+    finally:
+        for root, _, files in os.walk(static_folder):
+            for name in files:
+                if name.endswith(('.gz', '.br')):
+                    os.remove(os.path.join(root, name))
+
+# Test on-the-fly compression of dynamic responses
+def test_dynamic_responses_gzipped(client):
+    """Test that large HTML responses are gzipped and ETags weakened for compressed JSON."""
+    import gzip
+    resp = client.get("/notes/", headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert b"<html" in gzip.decompress(resp.data)
+
+    resp = client.post("/api/v1/notes", json={"title": "Zip", "content": "z" * 4000})
+    note_id = resp.get_json()['id']
+    resp = client.get(f"/api/v1/notes/{note_id}", headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert resp.headers['ETag'].startswith('W/')
+
+    # The weak ETag still validates conditional requests and If-Match
+    etag = resp.headers['ETag']
+    assert client.get(f"/api/v1/notes/{note_id}", headers={'If-None-Match': etag}).status_code == 304
+    resp = client.put(f"/api/v1/notes/{note_id}", json={"title": "Zip 2", "content": "z"}, headers={'If-Match': etag})
+    assert resp.status_code == 200
+
+# Test self-hosted frontend bundle
+def test_build_assets_local_bundle(client, tmp_path):
+    """Test that build-assets bundles vendored and app files and templates switch to it in local mode."""
+    import shutil
+    from models.assets import VENDOR_FILES
+    app = client.application
+    static_folder = tmp_path / "static"
+    shutil.copytree(app.static_folder, static_folder)
+    app.static_folder = str(static_folder)
+    runner = app.test_cli_runner()
+
+    # Offline builds fail clearly when vendor files were never downloaded
+    result = runner.invoke(args=['build-assets', '--offline'])
+    assert result.exit_code != 0
+    assert 'Missing vendor files' in result.output
+
+    for path in VENDOR_FILES:
+        target = static_folder / "vendor" / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(f"/* vendor {path} */ url(\"./fonts/bootstrap-icons.woff2\")" if path.endswith('.css') else f"// vendor {path}\n")
+    result = runner.invoke(args=['build-assets', '--offline'])
+    assert result.exit_code == 0, result.output
+
+    bundle_js = next((static_folder / "dist").glob("bundle.*.js")).read_text()
+    assert bundle_js.index("vendor jquery") < bundle_js.index("vendor bootstrap") < bundle_js.index("NoteManager")
+    bundle_css = next((static_folder / "dist").glob("bundle.*.css")).read_text()
+    assert "../vendor/bootstrap-icons/fonts/bootstrap-icons.woff2" in bundle_css
+
+    app.config['FRONTEND_ASSETS'] = 'local'
+    resp = client.get("/notes/")
+    assert b"/static/dist/bundle." in resp.data
+    assert b"cdn.jsdelivr.net" not in resp.data
+    assert b"js/notes.js" not in resp.data
+
+    app.config['FRONTEND_ASSETS'] = 'cdn'
+    resp = client.get("/notes/")
+    assert b"cdn.jsdelivr.net" in resp.data
+    assert resp.data.count(b"js/notes.js") == 1
+
+# Test request instrumentation
+def test_instrumentation_server_timing(tmp_path, caplog):
+    """Test that instrumented requests report timings in Server-Timing headers, log lines and profiles."""
+    import json
+    with configured_client(INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_PROFILE_DIR=str(tmp_path), INSTRUMENTATION_PROFILE_THRESHOLD_MS=0) as test_client:
+        with caplog.at_level('INFO', logger='flask_notes.instrumentation'):
+            resp = test_client.get("/notes/")
+
+    assert resp.status_code == 200
+    metrics = {part.split(';')[0]: part for part in resp.headers['Server-Timing'].split(', ')}
+    assert set(metrics) == {'app', 'db', 'tpl', 'locale'}
+    assert 'queries' in metrics['db']
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['endpoint'] == 'notes.index'
+    assert record['db_queries'] > 0
+    assert 0 < len(record['slowest_queries']) <= 3
+    assert record['template_ms'] > 0
+    assert os.path.exists(record['profile'])
+
+# Test profiling of overlapping requests
+def test_instrumentation_overlapping_requests(tmp_path, caplog, monkeypatch):
+    """Test that a request arriving while another one is profiled succeeds without a profile."""
+    import json
+    import threading
+    from models import instrumentation
+    current_timing = instrumentation.current_timing
+    responses = []
+
+    def overlapping(client):
+        # The first request profiled starts a second one from another thread and waits for it
+        if not responses and instrumentation._profile_lock.locked():
+            responses.append(None)
+            thread = threading.Thread(target=lambda: responses.append(client.application.test_client().get("/auth/login")))
+            thread.start()
+            thread.join()
+        return current_timing()
+
+    # A file database, as each thread gets its own in-memory SQLite database
+    with configured_client(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'notes.db'}", INSTRUMENTATION_ENABLED=True,
+                           INSTRUMENTATION_PROFILE_DIR=str(tmp_path), INSTRUMENTATION_PROFILE_THRESHOLD_MS=0) as test_client:
+        monkeypatch.setattr(instrumentation, 'current_timing', lambda: overlapping(test_client))
+        with caplog.at_level('INFO', logger='flask_notes.instrumentation'):
+            resp = test_client.get("/notes/")
+
+    assert resp.status_code == 200
+    assert responses[1].status_code == 200
+    records = {record['path']: record for record in (json.loads(r.getMessage()) for r in caplog.records)}
+    assert os.path.exists(records['/notes/']['profile'])
+    assert 'profile' not in records['/auth/login']
+    assert not instrumentation._profile_lock.locked()
+
+# Test Prometheus metrics endpoint
+def test_metrics_endpoint(tmp_path):
+    """Test that /metrics exposes request, pool and cache metrics summed over all worker files."""
+    import json
+    import subprocess
+    from models.metrics import Registry, ARCHIVE_FILE
+    # Another worker process that is still running and one that was killed after flushing
+    other = Registry()
+    other.inc('flask_notes_requests_total', endpoint='notes.index', method='GET', status=200)
+    other.observe('flask_notes_request_duration_seconds', 0.02, endpoint='notes.index')
+    (tmp_path / f"metrics_{os.getppid()}.json").write_text(json.dumps(other.snapshot()))
+    dead = subprocess.Popen([sys.executable, '-c', ''])
+    dead.wait()
+    (tmp_path / f"metrics_{dead.pid}.json").write_text(json.dumps(other.snapshot()))
+
+    with configured_client(METRICS_ENABLED=True, METRICS_DIR=str(tmp_path), RESPONSE_CACHE_BACKEND='memory',
+                           RESPONSE_CACHE_PATH=str(tmp_path / "cache.db"),
+                           SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'notes.db'}") as test_client:
+        test_client.get("/notes/")
+        test_client.get("/notes/")
+        resp = test_client.get("/metrics")
+        registry = test_client.application.extensions['metrics']
+
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/plain'
+    text = resp.get_data(as_text=True)
+    assert 'flask_notes_requests_total{endpoint="notes.index",method="GET",status="200"} 4' in text
+    assert 'flask_notes_request_duration_seconds_bucket{endpoint="notes.index",le="+Inf"} 4' in text
+    assert 'flask_notes_request_duration_seconds_count{endpoint="notes.index"} 4' in text
+    assert 'flask_notes_cache_requests_total{cache="response",result="hit"} 1' in text
+    assert 'flask_notes_cache_requests_total{cache="response",result="miss"} 1' in text
+    assert 'flask_notes_db_pool_checkouts_total' in text
+    assert 'flask_notes_db_pool_wait_seconds_count' in text
+    assert '# TYPE flask_notes_rate_limited_total counter' in text
+    assert (tmp_path / f"metrics_{os.getpid()}.json").exists()
+
+    # The killed worker's values moved to the archive, and this worker's move there at exit
+    assert not (tmp_path / f"metrics_{dead.pid}.json").exists()
+    assert (tmp_path / ARCHIVE_FILE).exists()
+    registry.retire()
+    assert not (tmp_path / f"metrics_{os.getpid()}.json").exists()
+    counters, _ = Registry(str(tmp_path)).collect()
+    assert counters[('flask_notes_requests_total', (('endpoint', 'notes.index'), ('method', 'GET'), ('status', 200)))] == 4
+
+# Test synthetic data generator
+def test_generate_synthetic_data(client):
+    """Test that the synthetic data generator creates deterministic users x notes x categories."""
+    from models.db_utils import generate_synthetic_data
+    usernames = generate_synthetic_data(3, 20, 4, seed=1)
+    assert usernames == ['synthetic_1_0', 'synthetic_1_1', 'synthetic_1_2']
+
+    users = User.query.filter(User.username.in_(usernames)).all()
+    assert len(users) == 3
+    assert users[0].check_password('benchmark')
+    for user in users:
+        assert Note.query.filter_by(user_id=user.id).count() == 20
+        assert Category.query.filter_by(user_id=user.id).count() == 4
+    titles = [note.title for note in Note.query.filter_by(user_id=users[0].id).order_by(Note.id)]
+
+    # The same seed generates the same notes in another database
+    with configured_client() as other_client:
+        with other_client.application.app_context():
+            generate_synthetic_data(1, 20, 4, seed=1)
+            user = User.query.filter_by(username='synthetic_1_0').one()
+            assert [note.title for note in Note.query.filter_by(user_id=user.id).order_by(Note.id)] == titles
+
+# Test bulk seeding command
+def test_seed_bulk_command(client):
+    """Test that seed-bulk inserts users, categories and notes in batches and refuses to reseed."""
+    runner = client.application.test_cli_runner()
+    result = runner.invoke(args=['seed-bulk', '--users', '3', '--notes-per-user', '25', '--categories', '2', '--seed', '7', '--batch-size', '10'])
+    assert result.exit_code == 0, result.output
+    assert 'Created 3 users, 6 categories and 75 notes' in result.output
+
+    user_ids = [user.id for user in User.query.filter(User.username.startswith('synthetic_7_'))]
+    assert len(user_ids) == 3
+    assert Note.query.filter(Note.user_id.in_(user_ids)).count() == 75
+    assert Category.query.filter(Category.user_id.in_(user_ids)).count() == 6
+    assert Note.query.filter(Note.user_id.in_(user_ids), Note.updated_at < Note.created_at).count() == 0
+
+    result = runner.invoke(args=['seed-bulk', '--users', '1', '--seed', '7'])
+    assert 'already exist' in result.output
+    assert User.query.filter(User.username.startswith('synthetic_7_')).count() == 3
+
+# Test database engine tuning
+def test_engine_tuning(tmp_path):
+    """Test that SQLite connections get the configured PRAGMAs and server databases get pool options."""
+    from sqlalchemy import text
+    from models.db_tuning import engine_options
+    with configured_client(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'notes.db'}", SQLITE_BUSY_TIMEOUT=2500) as test_client:
+        with test_client.application.app_context():
+            assert db.session.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+            assert db.session.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 2500
+            assert db.session.execute(text("PRAGMA mmap_size")).scalar() == 268435456
+        assert test_client.get("/notes/").status_code == 200
+
+    config = dict(test_client.application.config, SQLALCHEMY_DATABASE_URI='postgresql://user@localhost/notes')
+    options = engine_options(config)
+    assert options == {'pool_pre_ping': True, 'pool_size': 10, 'max_overflow': 20, 'pool_recycle': 1800, 'pool_timeout': 30}
+    assert engine_options(test_client.application.config) == {'pool_pre_ping': True}
+
+# Test read replica routing
+def test_read_replica_routing(tmp_path):
+    """Test that GET requests read from the replica, except right after the client wrote to the primary."""
+    import sqlite3
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+
+    def replicate():
+        with sqlite3.connect(primary) as source, sqlite3.connect(replica) as target:
+            source.backup(target)
+
+    with configured_client(SQLALCHEMY_DATABASE_URI=f"sqlite:///{primary}", SQLALCHEMY_REPLICA_URIS=[f"sqlite:///{replica}"]) as test_client:
+        replicate()
+        resp = test_client.post("/notes/add", data={'title': 'Fresh note', 'content': 'Only on the primary', 'category_id': 0})
+        assert resp.status_code == 302
+
+        # Pinned to the primary after the write, so the new note is visible
+        resp = test_client.get("/notes/")
+        assert b"Fresh note" in resp.data
+
+        # Once the pin expires, reads go to the (lagging) replica
+        with test_client.session_transaction() as sess:
+            sess['_primary_until'] = 0
+        resp = test_client.get("/notes/")
+        assert resp.status_code == 200
+        assert b"Fresh note" not in resp.data
+        with test_client.session_transaction() as sess:
+            assert '_primary_until' not in sess
+
+        replicate()
+        resp = test_client.get("/notes/")
+        assert b"Fresh note" in resp.data
+
+    # Replicas leave no global state behind for apps without them
+    with configured_client() as test_client:
+        assert test_client.get("/notes/").status_code == 200
+
+# Test cached user principal
+def test_user_principal_cache():
+    """Test that the user loader reuses a cached principal and drops it on password change and deletion."""
+    from models.cache import UserPrincipal
+    with configured_client(USER_CACHE_TTL=60) as test_client:
+        # The test app context is shared between requests, so forget the user loaded by the previous one
+        def get_notes():
+            g.pop('_login_user', None)
+            return test_client.get("/notes/")
+
+        with count_queries() as statements:
+            get_notes()
+        assert any('FROM users' in statement for statement in statements)
+
+        with count_queries() as statements:
+            resp = get_notes()
+        assert resp.status_code == 200
+        assert b"testuser" in resp.data
+        assert not any('FROM users' in statement for statement in statements)
+
+        from flask_login import current_user
+        assert isinstance(current_user._get_current_object(), UserPrincipal)
+
+        # A password change drops the cached principal
+        user = User.query.filter_by(username='testuser').one()
+        user.set_password('newpassword')
+        db.session.commit()
+        with count_queries() as statements:
+            get_notes()
+        assert any('FROM users' in statement for statement in statements)
+
+        # A deleted user is logged out on the next request
+        db.session.delete(user)
+        db.session.commit()
+        resp = get_notes()
+        assert resp.status_code == 302
+        assert '/auth/login' in resp.location
+
+# Test password hashing service
+def test_password_hashing_service():
+    """Test that logins upgrade outdated hashes and a full hashing queue returns 503."""
+    from werkzeug.security import generate_password_hash
+    with configured_client(PASSWORD_HASH_METHOD='pbkdf2:sha256:2000', PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE_SIZE=0) as test_client:
+        user = User.query.filter_by(username='testuser').one()
+        assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+        user.password_hash = generate_password_hash('testpassword', 'pbkdf2:sha256:1000')
+        db.session.commit()
+        with test_client.session_transaction() as sess:
+            sess.clear()
+
+        # Every hashing slot is taken, so the login is rejected instead of queued
+        hasher = test_client.application.extensions['password_hasher']
+        assert hasher._slots.acquire(blocking=False)
+        resp = test_client.post("/auth/login", data={"username": "testuser", "password": "testpassword"})
+        assert resp.status_code == 503
+        assert resp.headers['Retry-After'] == '5'
+        # The busy page is translated (Flask-Babel caches the locale on the test app context's g)
+        with test_client.session_transaction() as sess:
+            sess['language'] = 'de'
+        g.pop('_flask_babel', None)
+        resp = test_client.post("/auth/login", data={"username": "testuser", "password": "testpassword"})
+        assert "Server ausgelastet" in resp.get_data(as_text=True)
+        with test_client.session_transaction() as sess:
+            sess.pop('language')
+        g.pop('_flask_babel', None)
+        hasher._slots.release()
+
+        resp = test_client.post("/auth/login", data={"username": "testuser", "password": "testpassword"})
+        assert resp.status_code == 302
+        db.session.expire_all()
+        assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+        assert user.check_password('testpassword')
+        hasher.shutdown()
+
+# Test shared rate limit storage
+@pytest.mark.parametrize('strategy', ['fixed-window', 'moving-window', 'sliding-window-counter'])
+def test_sqlite_rate_limit_storage(tmp_path, strategy):
+    """Test that the SQLite limiter storage shares counters between instances (workers) and expires them."""
+    from limits import parse, strategies
+    from limits.storage import storage_from_string
+    from models.limiter_storage import SQLiteStorage
+    uri = f"sqlite:///{tmp_path / 'rate_limits.db'}"
+    worker_1 = strategies.STRATEGIES[strategy](storage_from_string(uri))
+    worker_2 = strategies.STRATEGIES[strategy](storage_from_string(uri))
+    assert isinstance(worker_1.storage, SQLiteStorage)
+    item = parse('3 per minute')
+
+    assert worker_1.hit(item, '10.0.0.1')
+    assert worker_2.hit(item, '10.0.0.1')
+    assert worker_1.hit(item, '10.0.0.1')
+    assert not worker_2.hit(item, '10.0.0.1')
+    assert worker_2.hit(item, '10.0.0.2')
+    assert worker_1.get_window_stats(item, '10.0.0.1').remaining == 0
+
+    worker_2.clear(item, '10.0.0.1')
+    assert worker_1.hit(item, '10.0.0.1')
+
+    # Expired counters are removed by the periodic purge
+    storage = worker_1.storage
+    storage.incr('cooldown', 0)
+    assert storage.get('cooldown') == 0
+    storage._next_purge = 0
+    storage.incr('other', 60)
+    assert storage._connect().execute("SELECT COUNT(*) FROM counters WHERE key = 'cooldown'").fetchone()[0] == 0
+
+# Test rate limit cooldown
+def test_rate_limit_cooldown():
+    """Test that the rate limit countdown is kept in the limiter storage instead of the session."""
+    from models.limiter import limiter
+    with configured_client(RATELIMIT_ENABLED=True) as test_client:
+        with test_client.session_transaction() as sess:
+            sess.clear()
+        for _ in range(10):
+            assert test_client.get("/auth/login").status_code == 200
+
+        resp = test_client.get("/auth/login")
+        assert resp.status_code == 429
+        retry_after = int(resp.headers['Retry-After'])
+        assert 0 < retry_after <= 61
+        assert limiter.storage.get('cooldown/127.0.0.1') == 1
+
+        # Refreshing keeps counting down instead of restarting, without session keys
+        resp = test_client.get("/auth/login")
+        assert resp.status_code == 429
+        assert int(resp.headers['Retry-After']) <= retry_after
+        with test_client.session_transaction() as sess:
+            assert not any(key.startswith('rl_') for key in sess)
+        limiter.reset()
+
+# Test server-side sessions
+def test_server_side_sessions(tmp_path):
+    """Test that session data is stored server-side, loaded lazily and expired."""
+    from models.sessions import ServerSideSessionInterface
+    with configured_client(SESSION_BACKEND='sqlite', SESSION_PATH=str(tmp_path / 'sessions.db')) as test_client:
+        interface = test_client.application.session_interface
+        assert isinstance(interface, ServerSideSessionInterface)
+        resp = test_client.get("/notes/")
+        assert resp.status_code == 200
+
+        # The cookie only holds an opaque ID
+        sid = test_client.get_cookie('session').value
+        assert '.' not in sid and len(sid) == 43
+        assert '_user_id' in interface.serializer.loads(interface.store.get(sid))
+
+        # Requests that never touch the session skip the lookup
+        lookups = []
+        get = interface.store.get
+        interface.store.get = lambda sid: lookups.append(sid) or get(sid)
+        assert test_client.get("/static/js/notes.js").status_code == 200
+        assert lookups == []
+        test_client.get("/notes/")
+        assert lookups == [sid]
+        interface.store.get = get
+
+        # Logging out changes the user, so the session gets a new ID
+        test_client.get("/auth/logout")
+        assert interface.store.get(sid) is None
+        assert test_client.get_cookie('session').value != sid
+
+        interface.store.set('stale', '{}', time.time() - 1)
+        assert interface.store.purge() == 1
+
+# Test locale resolution cache
+def test_locale_resolution_cache(client):
+    """Test that catalogs are loaded at startup and the locale is resolved once per request."""
+    from models import i18n
+    app = client.application
+    assert ('de', 'messages') in app.extensions['babel'].instance.domain_instance.cache
+
+    resolve = i18n.accept_language_resolver(['en', 'de'], 'en')
+    assert resolve('de-DE,de;q=0.9,en;q=0.8') == 'de'
+    assert resolve('de-DE,de;q=0.9,en;q=0.8') == 'de'
+    assert resolve('fr-FR') == 'en'
+    assert resolve.cache_info().hits == 1
+
+    calls = []
+    with app.test_request_context():
+        selector = i18n.memoized_per_request(lambda: calls.append(1) or 'de')
+        assert selector() == selector() == 'de'
+    assert len(calls) == 1
+
+    resp = client.get("/notes/", headers={'Accept-Language': 'de-DE,de;q=0.9'})
+    assert "Abmelden" in resp.get_data(as_text=True)
+    resp = client.get("/notes/", headers={'Accept-Language': 'en-US,en;q=0.9'})
+    assert "Logout" in resp.get_data(as_text=True)